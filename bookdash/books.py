@@ -1,38 +1,63 @@
 """Module for Book objects, which store information about a book."""
 
-import re
-from difflib import SequenceMatcher
-
 from lxml.html import HtmlElement
 
+from .elements.book_element import BookElement
 from .elements.found_book_element import FoundBookElement
+from .scoring import Scorer, normalize
 
 __all__ = ["Book"]
 
 
 class Book:
-    """Goodreads Books."""
+    """Goodreads Books.
+
+    Only the fields extracted from an element are kept, in slots, so that the
+    element and the document it was parsed from can be freed.
+    """
+
+    ATTRS = ("id", "title", "author", "series", "number")
+    """Attributes extracted from an element."""
 
-    ATTRS = {
-        'id': None,
-        'title': "property",
-        'author': None,
-        'series': "property",
-        'number': None,
-        'score': None,
-    }
+    __slots__ = (*ATTRS, "score", "matches")
 
-    MATCH_FILTERER = re.compile(r"(?!\w|\s).")
+    SCORER = Scorer()
+    """Scorer used by match() when none is given."""
 
     def __init__(self, element: HtmlElement = None, id: int = None):
-        """Initialize book attributes."""
-        for attr, prop in self.ATTRS.items():
-            if prop:
-                attr = f"_{attr}"
+        """Initialize book attributes.
+
+        Params
+        ------
+        element (HtmlElement, FoundBookElement, default: None): search
+                results row to extract the attributes from, which is not kept
+        id (int, default: None): goodreads book id
+        """
+        for attr in self.__slots__:
             setattr(self, attr, None)
+        self.matches = {}
+
+        if element is not None:
+            self.extract(element)
+        if id is not None:
+            self.id = id
 
-        self.element = element
-        self.id = id
+    @classmethod
+    def from_row(cls, row) -> "Book":
+        """Create a Book from a library database row.
+
+        The series and number are parsed from the title, the same as they are
+        for Goodreads search results.
+        """
+        parsed = BookElement()
+        parsed.title = row.title
+
+        book = cls(id=row.id)
+        book.title = parsed.title
+        book.series = parsed.series
+        book.number = parsed.number
+        book.author = row.author
+        return book
 
     def __repr__(self):
         """Book class repr."""
@@ -43,53 +68,64 @@ class Book:
         """Return the goodreads book url."""
         return f"https://www.goodreads.com/book/show/{self.id}"
 
-    @property
-    def element(self):
-        """Element getter."""
-        return self._element
-
-    @element.setter
-    def element(self, book) -> FoundBookElement:
-        """Element setter."""
-        if book is None:
-            return
+    def extract(self, element) -> None:
+        """Set the book attributes from element.
 
-        if not isinstance(book, FoundBookElement):
-            book = FoundBookElement(book)
+        Params
+        ------
+        element (HtmlElement, FoundBookElement): search results row
+        """
+        if not isinstance(element, FoundBookElement):
+            element = FoundBookElement(element)
 
         for attr in self.ATTRS:
-            setattr(self, attr, getattr(book, attr, None))
-
-        self._element = book
+            setattr(self, attr, getattr(element, attr, None))
 
     def normalize(self, text):
         """Normalize text for search."""
-        return self.MATCH_FILTERER.sub("", str(text).lower().strip())
+        return normalize(text)
+
+    @staticmethod
+    def filters(params: dict) -> dict:
+        """Return the non-empty field filters in params, or an empty dict if
+        params has a free text query, which can't be matched to a field."""
+        if params.get("query"):
+            return {}
+        return {
+            name: want for name, want in params.items()
+            if want and name != "query"
+        }
 
-    def match(self, params: dict):
+    def match(self, params: dict, scorer: Scorer = None):
         """Calculate a match score based on params."""
-        self.matches = {}
+        self.match_all([self], params, scorer)
 
-        if params.get("query"):
-            self.score = 0
-            return
+    @classmethod
+    def match_all(cls, books: list, params: dict, scorer: Scorer = None):
+        """Calculate the match score of each book based on params.
+
+        Each filter is scored against every book in one batch, so that its
+        value is only normalized once.
+        """
+        scorer = scorer or cls.SCORER
+        filters = cls.filters(params)
 
-        if "query" in params:
-            params.pop("query")
+        for book in books:
+            book.matches = {}
+            if not filters:
+                book.score = 0
+
+        if not filters:
+            return
 
-        for name, want in params.items():
-            if not want:
-                continue
-            have = getattr(self, name)
-            ratio = SequenceMatcher(
-                None,
-                self.normalize(have),
-                self.normalize(want)
-            ).ratio()
-            self.matches[name] = ratio
+        for name, want in filters.items():
+            have = [getattr(book, name) for book in books]
+            for book, ratio in zip(books, scorer.score_many(want, have)):
+                book.matches[name] = ratio
 
-        self.score = sum(self.matches.values()) / len(self.matches.values())
+        for book in books:
+            book.score = sum(book.matches.values()) / len(book.matches)
 
     def to_dict(self) -> dict:
-        """Return a dictionary of all attributes and values."""
-        return self.__dict__
+        """Return a dictionary of the book attributes and score."""
+        return {attr: getattr(self, attr) for attr in (*self.ATTRS, "score")}
@@ -1,11 +1,16 @@
 """Headless web browser via selenium webdriver."""
 
+from collections import deque
 from functools import cached_property, partialmethod
 from random import uniform
 from time import sleep
 
+from selenium import webdriver as selenium_webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium_stealth import stealth
 from seleniumwire import webdriver
 from seleniumwire.request import Response
@@ -15,10 +20,81 @@ from bookdash import forward_attr
 bp = breakpoint
 
 
+class AttachedDriver(selenium_webdriver.Remote):
+    """Remote web driver attached to a browser session started by another
+    process, such as the browser service."""
+
+    def __init__(self, executor_url: str, session_id: str):
+        """Attach to session_id of the driver server at executor_url."""
+        self.attach_to = session_id
+        super().__init__(
+            command_executor=executor_url,
+            options=selenium_webdriver.ChromeOptions(),
+        )
+
+    def start_session(self, capabilities: dict) -> None:
+        """Use the existing session instead of starting a new one."""
+        self.session_id = self.attach_to
+        self.caps = {}
+
+    def quit(self) -> None:
+        """Leave the browser running for the process that started it."""
+
+
+def executor_url(driver) -> str:
+    """Return the URL of the driver server that driver sends commands to."""
+    executor = driver.command_executor
+    client_config = getattr(executor, "_client_config", None)
+    if client_config:
+        return client_config.remote_server_addr
+    return executor._url
+
+
 class Browser():
-    """Headless web browser."""
+    """Headless web browser.
+
+    Requests are captured by selenium-wire unless capture is False, in which
+    case plain selenium is used with no intercepting proxy. Only the most
+    recent requests and responses are kept, and images, fonts and media are
+    not loaded by default.
+
+    If a lease from the browser service is given, the driver is attached to
+    the leased browser instead of starting a new one.
+    """
 
-    DELAY_RANGE = (0.1, 0.2)
+    TYPING_PROFILES = {
+        "human": (0.1, 0.2),
+        "quick": (0.02, 0.06),
+        "fast": None,
+    }
+    """Typing profile -> range of seconds to wait before each character, or
+    None to send all the text at once."""
+
+    DELAY_RANGE = TYPING_PROFILES["human"]
+
+    WAIT_TIMEOUT = 10
+    """Seconds to wait for a condition before giving up."""
+
+    POLL_FREQUENCY = 0.1
+    """Seconds between checks of a condition."""
+
+    BLOCKED_URLS = {
+        "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*",
+                   "*.svg*", "*.ico*"],
+        "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"],
+        "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.m4a*", "*.ogg*", "*.wav*"],
+    }
+    """URL patterns that are not loaded for each kind of resource. Each ends
+    in a wildcard so that URLs with a query string still match."""
+
+    BLOCK = ("images", "fonts", "media")
+    """Kinds of resources in BLOCKED_URLS that are not loaded by default."""
+
+    RESPONSES_MAX = 20
+    """Number of responses kept in .responses."""
+
+    REQUEST_STORAGE_MAX_SIZE = 100
+    """Number of requests selenium-wire keeps in driver.requests."""
 
     USERAGENT = (
         "Mozilla/5.0 "
@@ -30,10 +106,39 @@ class Browser():
 
     started = False
 
-    def __init__(self, headless=True, user_data_dir=None):
+    def __init__(self, headless=True, user_data_dir=None, lease=None,
+                 capture=True, scopes=None, exclude_urls=None,
+                 exclude_hosts=None, block=None, typing=None):
+        """Headless web browser.
+
+        Params
+        ------
+        headless (bool, default: True): hide the browser window
+        user_data_dir (str, default: None): Chrome profile directory
+        lease (Lease, default: None): browser leased from the browser service
+        capture (bool, default: True): capture requests with selenium-wire
+        scopes (list[str], default: None): only capture requests to URLs that
+               match one of these regular expressions
+        exclude_urls (list[str], default: None): don't capture requests to URLs
+                     that match one of these regular expressions
+        exclude_hosts (list[str], default: None): hosts whose requests bypass
+                      the selenium-wire proxy
+        block (Iterable[str], default: BLOCK): kinds of resources in
+              BLOCKED_URLS not to load
+        typing (str, default: None): name of a typing profile in
+               TYPING_PROFILES to use instead of DELAY_RANGE
+        """
         self.headless = headless
         self.user_data_dir = user_data_dir
-        self.responses = []
+        self.lease = lease
+        self.capture = capture
+        self.scopes = list(scopes or [])
+        self.exclude_urls = list(exclude_urls or [])
+        self.exclude_hosts = list(exclude_hosts or [])
+        self.block = tuple(self.BLOCK if block is None else block)
+        self.responses = deque(maxlen=self.RESPONSES_MAX)
+        if typing:
+            self.DELAY_RANGE = self.TYPING_PROFILES[typing]
 
     @property
     def options(self):
@@ -61,12 +166,67 @@ class Browser():
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option("useAutomationExtension", False)
 
+        if "images" in self.block:
+            options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+            })
+
         return options
 
+    @property
+    def seleniumwire_options(self) -> dict:
+        """Return the selenium-wire options that bound request capture."""
+        return {
+            "request_storage": "memory",
+            "request_storage_max_size": self.REQUEST_STORAGE_MAX_SIZE,
+            "exclude_hosts": self.exclude_hosts,
+        }
+
+    @property
+    def capture_scopes(self) -> list[str]:
+        """Return the selenium-wire scopes for the requests to capture.
+
+        Scopes only include URLs, so excluded URLs are combined with them
+        into a single regular expression with a negative lookahead.
+
+        Example:
+            >>> Browser(scopes=["goodreads"], exclude_urls=["/ads/"]).capture_scopes
+            ['^(?!.*(?:/ads/)).*(?:goodreads)']
+        """
+        if not self.exclude_urls:
+            return self.scopes
+        excluded = "|".join(self.exclude_urls)
+        included = "|".join(self.scopes)
+        return [f"^(?!.*(?:{excluded})).*(?:{included})"]
+
+    @property
+    def blocked_urls(self) -> list[str]:
+        """Return the URL patterns of the resources not to load."""
+        return [
+            pattern for kind in self.block
+            for pattern in self.BLOCKED_URLS.get(kind, [])
+        ]
+
     @cached_property
     def driver(self):
         """Return a web driver."""
-        driver = webdriver.Chrome(options=self.options)
+        if self.lease:
+            self.started = True
+            return AttachedDriver(self.lease.executor_url, self.lease.session_id)
+
+        if self.capture:
+            driver = webdriver.Chrome(
+                options=self.options,
+                seleniumwire_options=self.seleniumwire_options,
+            )
+            if (scopes := self.capture_scopes):
+                driver.scopes = scopes
+        else:
+            driver = selenium_webdriver.Chrome(options=self.options)
+
+        if (blocked_urls := self.blocked_urls):
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
 
         # nicer window size and position,
         # also may evade CAPCHA detection
@@ -117,8 +277,10 @@ class Browser():
     def get(self, url) -> Response:
         """Send a get request and return response."""
         self.driver.get(url)
-        if self.driver.last_request:
-            self.responses.append(self.driver.last_request.response)
+        # requests are only captured by selenium-wire drivers started here
+        last_request = getattr(self.driver, "last_request", None)
+        if last_request and last_request.response:
+            self.responses.append(last_request.response)
             return self.last_response
 
     @property
@@ -127,9 +289,18 @@ class Browser():
             return
         return self.responses[-1]
 
-    def quit(self):
-        """Quit the browser driver if it has been started."""
-        if self.started:
+    def quit(self, ok: bool = True):
+        """Quit the browser driver if it has been started, or return a leased
+        browser to the browser service.
+
+        Params
+        ------
+        ok (bool, default: True): False if a leased browser may be left in a
+           bad state, so that the service replaces it
+        """
+        if self.lease:
+            self.lease.release(ok)
+        elif self.started:
             self.driver.quit()
 
     def find(self, by, query, *args, get_all=False, quiet=False, **kwargs):
@@ -167,8 +338,63 @@ class Browser():
     find_xpath = partialmethod(find, By.XPATH)
 
 
+    def wait(self, condition, timeout: float = None, message: str = ""):
+        """Wait until condition returns a truthy value and return it.
+
+        Params
+        ------
+        condition (Callable): function that takes the driver, such as an
+                  expected condition
+        timeout (float, default: WAIT_TIMEOUT): seconds to wait
+        message (str, default: ""): message for the TimeoutException
+
+        Raises
+        ------
+        TimeoutException: if condition is not met in time
+        """
+        waiter = WebDriverWait(
+            self.driver,
+            self.WAIT_TIMEOUT if timeout is None else timeout,
+            poll_frequency=self.POLL_FREQUENCY,
+        )
+        return waiter.until(condition, message)
+
+    def wait_visible(self, xpath: str, timeout: float = None) -> WebElement:
+        """Wait for the element at xpath to be visible and return it."""
+        return self.wait(
+            EC.visibility_of_element_located((By.XPATH, xpath)), timeout,
+            f"Element not visible: {xpath}",
+        )
+
+    def wait_clickable(self, xpath: str, timeout: float = None) -> WebElement:
+        """Wait for the element at xpath to be clickable and return it."""
+        return self.wait(
+            EC.element_to_be_clickable((By.XPATH, xpath)), timeout,
+            f"Element not clickable: {xpath}",
+        )
+
+    def wait_url_changes(self, url: str, timeout: float = None) -> bool:
+        """Wait for the current URL to be different from url."""
+        return self.wait(
+            EC.url_changes(url), timeout, f"URL did not change from: {url}"
+        )
+
+    def wait_cookie(self, name: str, timeout: float = None) -> dict:
+        """Wait for the cookie name to be set and return it."""
+        return self.wait(
+            lambda driver: driver.get_cookie(name), timeout,
+            f"Cookie not set: {name}",
+        )
+
     def type_slowly(self, field, *keys):
-        """Simulate human typing by sending text one character at a time followed by a delay."""
+        """Simulate human typing by sending text one character at a time followed by a delay.
+
+        If DELAY_RANGE is None, the text is sent all at once.
+        """
+        if self.DELAY_RANGE is None:
+            field.send_keys(*keys)
+            return
+
         for text in keys:
             for c in text:
                 sleep(uniform(*self.DELAY_RANGE))
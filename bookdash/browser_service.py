@@ -0,0 +1,359 @@
+"""Long-lived browser service.
+
+Starting Chrome takes several seconds, so the browser service keeps one
+browser running and leases it to other processes over a local socket. A
+lease holds the browser until it is released or its connection is closed,
+and other callers wait their turn. The browser is replaced after MAX_USES
+leases, when a lease ends in an error, or when it has crashed.
+
+Messages are JSON objects, one per line:
+
+    {"op": "lease"}               -> {"executor_url": ..., "session_id": ...}
+    {"op": "release", "ok": true} -> {"ok": true}
+    {"op": "status"}              -> {"running": true, "uses": 0, ...}
+    {"op": "stop"}                -> {"ok": true}
+"""
+
+import json
+import socket
+import socketserver
+from pathlib import Path
+from threading import Event, Lock
+from typing import Callable
+
+from selenium.common.exceptions import WebDriverException
+
+from bookdash import SystemError, log
+from bookdash.browser import Browser, executor_url
+from bookdash.config import Config
+
+bp = breakpoint
+
+__all__ = ["BrowserService", "Lease", "ServiceNotRunning", "ServiceUnavailable",
+           "lease", "send"]
+
+SOCKET_FILE = Config().data_dir / "browser.sock"
+"""Default socket file the service listens on."""
+
+LEASE_TIMEOUT = 60
+"""Seconds to wait for the browser to be free."""
+
+
+class ServiceUnavailable(SystemError):
+    """The browser service is not running or the browser is not free."""
+
+
+class ServiceNotRunning(ServiceUnavailable):
+    """The browser service is not running, so its browser profile is free."""
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Handle the messages from one client connection."""
+
+    def handle(self):
+        """Reply to each message, releasing the lease if the client
+        disconnects without releasing it."""
+        service, leased = self.server.service, False
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                op = message.get("op")
+
+                if op == "lease" and not leased:
+                    # don't wait on a browser for a client that has given up
+                    if not service.lock.acquire(timeout=LEASE_TIMEOUT):
+                        self.reply({"error": "Timed out waiting for the browser."})
+                        continue
+                    try:
+                        self.reply(service.lease())
+                    except WebDriverException as e:
+                        service.lock.release()
+                        reply = {"error": f"Browser failed to start: {e}"}
+                    except BaseException:
+                        # the client gave up waiting, so the browser is unused
+                        service.lock.release()
+                        raise
+                    else:
+                        leased = True
+                        continue
+                elif op == "release" and leased:
+                    leased = False
+                    self.release(message.get("ok", True), reply={"ok": True})
+                    continue
+                elif op == "status":
+                    reply = service.status()
+                elif op == "stop":
+                    self.reply({"ok": True})
+                    self.server.shutdown()
+                    return
+                else:
+                    reply = {"error": f"Invalid message: {message}"}
+
+                self.reply(reply)
+        finally:
+            if leased:
+                self.release(False)
+
+    def release(self, ok: bool, reply: dict = None) -> None:
+        """End the lease, send reply, replace the browser if it is due and
+        then free it for the next caller.
+
+        The reply is sent first so that the client doesn't wait for a new
+        browser to start.
+        """
+        service = self.server.service
+        try:
+            replace = service.release(ok)
+            if reply:
+                self.reply(reply)
+            if replace:
+                service.recycle()
+        finally:
+            service.lock.release()
+
+    def reply(self, message: dict) -> None:
+        """Send message to the client."""
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server that handles each connection in a thread."""
+
+    daemon_threads = True
+
+
+class BrowserService:
+    """Keep a browser warm and lease it to clients over a local socket."""
+
+    MAX_USES = 20
+    """Number of leases before the browser is replaced."""
+
+    def __init__(self, factory: Callable = None, socket_file: Path = None,
+                 max_uses: int = None, user_data_dir: str = None):
+        """Browser service.
+
+        Params
+        ------
+        factory (Callable, default: start_driver): function that returns a
+                new web driver
+        socket_file (Path, default: SOCKET_FILE): socket file to listen on
+        max_uses (int, default: MAX_USES): leases before the browser is
+                 replaced
+        user_data_dir (str, default: None): Chrome profile directory
+        """
+        self.factory = factory or self.start_driver
+        self.socket_file = Path(socket_file or SOCKET_FILE)
+        self.max_uses = max_uses or self.MAX_USES
+        self.user_data_dir = user_data_dir
+
+        self.driver = None
+        self.uses = 0
+        self.started = 0
+        self.lock = Lock()
+        self.ready = Event()
+        self.server = None
+
+    def __repr__(self):
+        """BrowserService class repr."""
+        return (f"BrowserService <socket_file={str(self.socket_file)!r}, "
+                f"uses={self.uses}/{self.max_uses}>")
+
+    def start_driver(self):
+        """Return the driver of a new stealth configured browser.
+
+        Leased browsers are attached to without selenium-wire, so requests
+        are not captured.
+        """
+        return Browser(user_data_dir=self.user_data_dir, capture=False).driver
+
+    def alive(self) -> bool:
+        """Return True if the browser is running and responding."""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.current_url
+        except WebDriverException:
+            return False
+        return True
+
+    def warm(self) -> None:
+        """Start a browser if one is not running."""
+        if self.driver is not None:
+            return
+        self.driver = self.factory()
+        self.uses = 0
+        self.started += 1
+        log(prefix="BrowserService.warm()", session_id=self.driver.session_id)
+
+    def quit(self) -> None:
+        """Quit the browser, ignoring errors from one that has crashed."""
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def recycle(self) -> None:
+        """Quit the browser and start a new one."""
+        self.quit()
+        self.warm()
+
+    def lease(self) -> dict:
+        """Return the details needed to attach to the browser, replacing it
+        first if it has crashed. The caller must hold the lock."""
+        if not self.alive():
+            self.recycle()
+        return {
+            "executor_url": executor_url(self.driver),
+            "session_id": self.driver.session_id,
+        }
+
+    def release(self, ok: bool = True) -> bool:
+        """Count a finished lease and return True if the browser should be
+        replaced because it has been used max_uses times or the lease ended
+        in an error."""
+        self.uses += 1
+        return not ok or self.uses >= self.max_uses
+
+    def status(self) -> dict:
+        """Return the service status."""
+        return {
+            "running": self.driver is not None,
+            "leased": self.lock.locked(),
+            "uses": self.uses,
+            "max_uses": self.max_uses,
+            "started": self.started,
+            "session_id": getattr(self.driver, "session_id", None),
+        }
+
+    def serve(self) -> None:
+        """Start the browser and handle leases until stopped."""
+        self.socket_file.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_file.unlink(missing_ok=True)
+
+        self.warm()
+        self.server = Server(str(self.socket_file), Handler)
+        self.server.service = self
+        self.ready.set()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.socket_file.unlink(missing_ok=True)
+            self.quit()
+
+    def stop(self) -> None:
+        """Stop serving from another thread."""
+        if self.server:
+            self.server.shutdown()
+
+
+def connect(socket_file: Path = None, timeout: float = None) -> socket.socket:
+    """Return a socket connected to the browser service.
+
+    Raises
+    ------
+    ServiceNotRunning: if the service is not running
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_file or SOCKET_FILE))
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        sock.close()
+        raise ServiceNotRunning(f"Browser service is not running: {e}") from e
+    return sock
+
+
+def request(sock: socket.socket, reader, message: dict) -> dict:
+    """Send message and return the reply.
+
+    Raises
+    ------
+    ServiceUnavailable: if there is no reply in time or the reply is an error
+    """
+    try:
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        line = reader.readline()
+    except socket.timeout as e:
+        raise ServiceUnavailable("Timed out waiting for the browser service.") from e
+    if not line:
+        raise ServiceUnavailable("Browser service closed the connection.")
+
+    reply = json.loads(line)
+    if "error" in reply:
+        raise ServiceUnavailable(reply["error"])
+    return reply
+
+
+def send(message: dict, socket_file: Path = None, timeout: float = 5) -> dict:
+    """Send one message to the browser service and return the reply."""
+    with connect(socket_file, timeout) as sock, sock.makefile("rb") as reader:
+        return request(sock, reader, message)
+
+
+class Lease:
+    """A browser leased from the browser service, held until released or the
+    connection is closed."""
+
+    def __init__(self, socket_file: Path = None, timeout: float = LEASE_TIMEOUT):
+        """Wait up to timeout seconds to lease the browser.
+
+        Raises
+        ------
+        ServiceNotRunning: if the service is not running
+        ServiceUnavailable: if the browser is not free in time or failed to
+                            start
+        """
+        self.sock = connect(socket_file, timeout)
+        self.reader = self.sock.makefile("rb")
+        try:
+            reply = request(self.sock, self.reader, {"op": "lease"})
+        except BaseException:
+            self.close()
+            raise
+        self.executor_url = reply["executor_url"]
+        self.session_id = reply["session_id"]
+        self.released = False
+
+    def __repr__(self):
+        """Lease class repr."""
+        return f"Lease <session_id={self.session_id!r}>"
+
+    def __enter__(self):
+        """Return the lease."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Release the lease, asking for a new browser if there was an error."""
+        self.release(ok=exc_type is None)
+
+    def release(self, ok: bool = True) -> None:
+        """Return the browser to the service.
+
+        Params
+        ------
+        ok (bool, default: True): False if the browser may be left in a bad
+           state, so that it is replaced
+        """
+        if self.released:
+            return
+        self.released = True
+        try:
+            request(self.sock, self.reader, {"op": "release", "ok": ok})
+        except (OSError, ServiceUnavailable):
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Close the connection, which releases the lease if it is held."""
+        self.reader.close()
+        self.sock.close()
+
+
+def lease(socket_file: Path = None, timeout: float = LEASE_TIMEOUT) -> Lease:
+    """Return a Lease of the browser from the browser service."""
+    return Lease(socket_file, timeout)
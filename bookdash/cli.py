@@ -1,5 +1,6 @@
 """Module for the command line interface."""
 
+from pathlib import Path
 from typing import Collection
 
 import click
@@ -17,11 +18,18 @@ from sqlmodel import select
 from tabulate import tabulate
 from xdg.BaseDirectory import save_config_path
 
-from bookdash import abort, error, log
+from bookdash import abort, browser_service, error, log
+from bookdash.books import Book
+from bookdash.browser_service import BrowserService
+from bookdash.clients.base_client import RequestError
 from bookdash.clients.goodreads_client import GoodreadsClient
 from bookdash.config import Config, GoodreadsConfig, init_config
 from bookdash.db import DB
+from bookdash.importer import Importer
+from bookdash.library import Library
+from bookdash.models.book_details import BookDetails
 from bookdash.models.goodreads_book import GoodreadsBook
+from bookdash.ranking import Ranker
 
 bp = breakpoint
 
@@ -122,14 +130,125 @@ def get_keys(data: dict, fields: Collection, keep_empty: bool=False) -> dict:
     }
     return new
 
-@click.command(context_settings={"ignore_unknown_options": True},
-               options_metavar="[<filters>]")
+
+class DefaultGroup(click.Group):
+    """Command group that runs a default command when no other command is
+    named, so that `books "Ender's Game"` still works as a search."""
+
+    def __init__(self, *args, default: str = None, **kwargs):
+        """Set the name of the default command."""
+        self.default = default
+        super().__init__(*args, **kwargs)
+
+    def parse_args(self, ctx, args):
+        """Prepend the default command name unless a command or the group's
+        help option is given."""
+        help_options = self.get_help_option_names(ctx)
+        if not args or args[0] not in {*self.commands, *help_options}:
+            args.insert(0, self.default)
+        return super().parse_args(ctx, args)
+
+
+def library_rows(books: list) -> dict:
+    """Return the library database rows for books, mapped by id."""
+    db = DB()
+    db.create()
+    return db.select_by_ids(GoodreadsBook, (book.id for book in books))
+
+
+def book_row(i: int, book: Book, row: GoodreadsBook = None) -> dict:
+    """Return the results table row for book, annotated with its library row."""
+    return {
+        '#': i,
+        'Title': trim(book.title, 60),
+        'Author': book.author,
+        'Series': trim(book.series, 40),
+        'Shelf': row.exclusive_shelf if row else "",
+        'Rating': (row.my_rating or "") if row else "",
+        'Reads': (row.read_count or "") if row else "",
+    }
+
+
+STREAM_WIDTHS = {
+    "#": 3, "Title": 60, "Author": 25, "Series": 40,
+    "Shelf": 12, "Rating": 6, "Reads": 5,
+}
+"""Column widths for results printed as they arrive."""
+
+
+def stream_rows(batches) -> list:
+    """Print a fixed width results table row for each book as it arrives and
+    return the list of books.
+
+    The library rows for each batch of books are selected in one query.
+    """
+    db = DB()
+    db.create()
+
+    def line(values):
+        return "  ".join(
+            f"{trim(value, width):<{width}}"
+            for value, width in zip(values, STREAM_WIDTHS.values())
+        ).rstrip()
+
+    print()
+    print(line(STREAM_WIDTHS))
+    print(line("-" * width for width in STREAM_WIDTHS.values()))
+
+    received = []
+    for books in batches:
+        owned = db.select_by_ids(GoodreadsBook, (book.id for book in books))
+        for book in books:
+            row = owned.get(int(book.id)) if book.id else None
+            received.append(book)
+            print(line(book_row(len(received), book, row).values()), flush=True)
+    return received
+
+
+def search_library(limit: int = None, **kwargs) -> Ranker:
+    """Return a Ranker of Book objects from the local library full-text
+    index."""
+    library = Library()
+    library.create()
+    filters = get_keys(kwargs, ("title", "author", "series"))
+
+    books = [Book.from_row(row) for row in library.search(**filters)]
+    Book.match_all(books, filters)
+
+    ranker = Ranker(limit)
+    ranker.extend(books)
+    return ranker
+
+
+@click.group(cls=DefaultGroup, default="search",
+             context_settings={"help_option_names": ["-h", "--help"]})
+def main():
+    """Books dashboard."""
+
+
+@main.command("search", context_settings={"ignore_unknown_options": True},
+              options_metavar="[<filters>]")
 @click.option("-c", "--init-config", is_flag=True, help="initialize config file and print path")
 @click.option("-t", "--title", help="filter by book title")
 @click.option("-a", "--author", help="filter by book author")
 @click.option("-s", "--series", help="filter by book series")
+@click.option("-l", "--library", is_flag=True,
+              help="search the local library instead of goodreads")
+@click.option("-L", "--local-first", is_flag=True,
+              help="search goodreads only if there is no good library match")
 @click.option('--save/--no-save', '-S/', default=False,
               help="save requested contents for debugging")
+@click.option("--cache/--no-cache", default=True,
+              help="use cached goodreads responses")
+@click.option("-n", "--limit", type=click.IntRange(min=1), default=Ranker.LIMIT,
+              show_default=True,
+              help="maximum number of results to show")
+@click.option("-p", "--pages", type=click.IntRange(min=1), default=1,
+              show_default=True,
+              help="maximum number of goodreads result pages to fetch")
+@click.option("--stream", is_flag=True,
+              help="print goodreads results as they download, in page order "
+              "(first page only)")
 @click.argument("query", nargs=-1, metavar="[<title>]")
 def search(**kwargs):
     """Search for book and print details."""
@@ -140,59 +259,172 @@ def search(**kwargs):
         config_init()
         return
 
+    local = kwargs.pop("library")
+    local_first = kwargs.pop("local_first")
+    stream = kwargs.pop("stream")
+    limit = kwargs.pop("limit")
+    pages = kwargs.pop("pages")
+
     if kwargs["query"]:
         kwargs["title"] = " ".join(kwargs.pop("query"))
 
-    if not any(kwargs.values()):
+    if not any(get_keys(kwargs, ("title", "author", "series"))):
         abort("Received no search arguments.")
 
-    creds = GoodreadsConfig()
-    api = GoodreadsClient(**kwargs)
-    #  api.login(creds.email, creds.pwd)
-    books = api.search()
-    rows = []
-    for i, book in enumerate(books, 1):
-        rows.append({
-            '#': i,
-            'Title': trim(book.title, 60),
-            'Author': book.author,
-            'Series': trim(book.series, 40),
-        })
-
-    if not rows:
-        return
+    books, source, streamed, api, owned = None, None, False, None, None
+    if local or local_first:
+        ranker, source = search_library(limit, **kwargs), "library"
+        books = ranker.results()
+
+        # only use the library results if they are good enough
+        if local_first and not ranker.satisfied:
+            books = None
+
+    if books is None:
+        source = "goodreads"
+        if local_first:
+            source += " (no confident library match)"
+
+        creds = GoodreadsConfig()
+        api = GoodreadsClient(**kwargs)
+        #  api.login(creds.email, creds.pwd)
+        try:
+            if stream:
+                print(f"Source: {source}")
+                books, streamed = stream_rows(api.iter_search_batches()), True
+            else:
+                books = api.search(limit, pages)
+        except RequestError as e:
+            abort(e)
+
+    # streamed results have already been printed
+    if not streamed:
+        print(f"Source: {source}")
+
+        owned = library_rows(books)
+        rows = [
+            book_row(i, book, owned.get(int(book.id)) if book.id else None)
+            for i, book in enumerate(books, 1)
+        ]
+
+        if not rows:
+            return
 
-    print()
-    print(tabulate(rows, headers="keys"))
+        print()
+        print(tabulate(rows, headers="keys"))
 
     if not books:
         return
 
-    # prompt user to enter book number
-    if len(books) == 1:
-        book = books[0]
-    else:
-        book = None
-        while book is None:
-            reply = prompt("Book # >").strip()
-            if reply.lower() == "q":
-                return
+    # fetch the details of the top results while the user is choosing
+    if api and len(books) > 1:
+        api.prefetch(book.id for book in books)
+
+    try:
+        # prompt user to enter book number
+        if len(books) == 1:
+            book = books[0]
+        else:
+            book = None
+            while book is None:
+                reply = prompt("Book # >").strip()
+                if reply.lower() == "q":
+                    return
+
+                try:
+                    book_no = int(reply) - 1
+
+                    if book_no < 0:
+                        raise ValueError()
+                    book = books[book_no]
+
+                except (ValueError, IndexError):
+                    print()
+                    error(f"Invaid response. Please enter 1-{len(books)}")
+                    continue
+        show(book, api, owned)
+    finally:
+        if api:
+            api.stop_prefetch()
+
+
+@main.command("browser")
+@click.argument("action", type=click.Choice(["start", "stop", "status"]),
+                default="start")
+@click.option("-n", "--max-uses", type=click.IntRange(min=1),
+              default=BrowserService.MAX_USES,
+              show_default=True, help="leases before the browser is replaced")
+def browser(action, max_uses):
+    """Keep a browser running for goodreads logins."""
+    if action == "start":
+        service = BrowserService(
+            max_uses=max_uses, user_data_dir=str(GoodreadsClient.BROWSER_DIR)
+        )
+        print(f"Browser service listening on {service.socket_file}")
+        service.serve()
+        return
+
+    try:
+        reply = browser_service.send({"op": action})
+    except browser_service.ServiceUnavailable as e:
+        abort(e)
+
+    if action == "stop":
+        print("Browser service stopped.")
+        return
 
-            try:
-                book_no = int(reply) - 1
+    for name, value in reply.items():
+        print(f"{titlize(name)}: {value}")
 
-                if book_no < 0:
-                    raise ValueError()
-                book = books[book_no]
 
-            except (ValueError, IndexError):
-                print()
-                error(f"Invaid response. Please enter 1-{len(books)}")
-                continue
-    show(book)
+@main.command("import")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option("-n", "--chunk-size", type=click.IntRange(min=1),
+              default=Importer.CHUNK_SIZE,
+              show_default=True, help="rows to write per transaction")
+@click.option("--prune", is_flag=True,
+              help="delete books that are not in the file")
+def import_books(file, chunk_size, prune):
+    """Import a Goodreads library export CSV file."""
+    importer = Importer(Path(file), chunk_size=chunk_size, prune=prune)
+    run = importer.run()
+    print(f"Imported {run.summary()}.")
+    print(f"Finished in {importer.elapsed:.2f}s "
+          f"({importer.rate:.0f} rows/sec).")
 
-def show(book):
-    """Show book details."""
+
+def book_details(book, db: DB, api: GoodreadsClient = None) -> dict:
+    """Return the stored goodreads details for book, or {}.
+
+    If api is given, missing or stale details are fetched from goodreads.
+    """
+    if not book.id:
+        return {}
+
+    try:
+        if api:
+            details = api.show(book.id, db)
+        else:
+            details = db.select_one(BookDetails, BookDetails.id == int(book.id))
+    except RequestError as e:
+        error(e)
+        return {}
+
+    return {name: value for name, value in dict(details).items()
+            if value is not None and name != "fetched_at"}
+
+
+def show(book, api: GoodreadsClient = None, owned: dict = None):
+    """Show book details.
+
+    Params
+    ------
+    book (Book): the book to show
+    api (GoodreadsClient, default: None): client to fetch book details with,
+        otherwise only details already stored are shown
+    owned (dict, default: None): library rows already selected for the
+        search results, mapped by id
+    """
 
     # fields to display in the book info table
     book_info_fields = (
@@ -204,9 +436,14 @@ def show(book):
         "isbn13",
         "year_published",
         "original_year_published",
-        "publisher"
+        "publisher",
         "binding",
+        "format",
         "pages",
+        "publication",
+        "rating",
+        "ratings_count",
+        "genres",
         "year_published",
         "original_year_published",
     )
@@ -234,10 +471,18 @@ def show(book):
 
 
     db = DB()
-    row = db.select_one(GoodreadsBook, GoodreadsBook.id == int(book.id))
+    db.create()
+    if owned is None:
+        row = db.select_one(GoodreadsBook, GoodreadsBook.id == int(book.id))
+    else:
+        row = owned.get(int(book.id)) or {}
 
     book_data = book.to_dict().copy()
-    book_data.update(row)
+    book_data.update(book_details(book, db, api))
+    # library values take precedence over the goodreads page, unless empty
+    book_data.update({
+        name: value for name, value in dict(row).items() if value is not None
+    })
 
     book_table = mktable("Book")
 
@@ -1,16 +1,43 @@
 """Module for web scraping clients that can be operated like API clients."""
 
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from functools import partialmethod
+from random import uniform
+from time import sleep
+from urllib.parse import urlparse
 
 import requests
 from bs4 import BeautifulSoup
 from more_itertools import first
 
-from bookdash import abort, log
+from bookdash import SystemError, log
+from bookdash.clients.rate_limiter import bucket_for
+from bookdash.clients.response_cache import ResponseCache
 
 bp = breakpoint
 
-__all__ = ["BaseClient"]
+__all__ = ["BaseClient", "RequestError", "RateLimitedError"]
+
+
+class RequestError(SystemError):
+    """A request failed."""
+
+    def __init__(self, message: str, response: requests.Response = None):
+        """Request error with the failed response, if there was one."""
+        super().__init__(message)
+        self.response = response
+
+    @property
+    def status_code(self) -> int:
+        """Return the status code of the failed response."""
+        if self.response is None:
+            return
+        return self.response.status_code
+
+
+class RateLimitedError(RequestError):
+    """A request was still being rate limited after all retries."""
 
 
 class BaseClient:
@@ -22,19 +49,187 @@ class BaseClient:
         "Version/9.0.2 Safari/601.3.9"
     )
 
-    def __init__(self, **kwargs):
+    CACHE_FILE = None
+    """Response cache file, or None to disable caching by default."""
+
+    CACHE_TTLS = {}
+    """URL path prefix -> seconds a cached response is fresh for."""
+
+    RATE_LIMIT = None
+    """(requests per second, burst) allowed to each host, or None."""
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    """Response status codes that are retried."""
+
+    RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    """Methods that are safe to send again after the server may have acted on
+    the first request."""
+
+    RETRY_AFTER_STATUSES = frozenset({429, 503})
+    """Statuses that are retried for any method when they have a Retry-After
+    header, since the server refused the request without acting on it."""
+
+    MAX_RETRIES = 3
+
+    BACKOFF_BASE = 0.5
+    """Seconds to wait before the first retry, doubled each retry."""
+
+    BACKOFF_MAX = 30.0
+    """Maximum seconds to wait before a retry."""
+
+    def __init__(self, cache=None, **kwargs):
+        """API client.
+
+        Params
+        ------
+        cache (bool, ResponseCache, default: None): False to disable the
+              response cache, or a ResponseCache to use instead of CACHE_FILE
+        """
         self.responses = []
         self.session = requests.session()
         self.session.headers.update({'user-agent': self.AGENT})
 
+        if cache is None or cache is True:
+            cache = self.CACHE_FILE and ResponseCache(
+                self.CACHE_FILE, ttls=self.CACHE_TTLS
+            )
+        self.cache = cache or None
+
+    def cached_request(self, method, url, **kwargs):
+        """Return a cached response if fresh, otherwise make a session request
+        and cache the response.
+
+        Stale responses are revalidated with a conditional request.
+        """
+        cache = self.cache
+        key = cache.key(method, url, kwargs.get("params"), self.auth_marker())
+        entry = cache.get(key)
+
+        if entry and cache.fresh(entry):
+            request = self.session.prepare_request(
+                requests.Request(method, url, params=kwargs.get("params"))
+            )
+            return cache.response(entry, request)
+
+        if entry:
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}), **cache.validators(entry)
+            }
+
+        response = self.send(method, url, **kwargs)
+
+        if entry and response.status_code == 304:
+            entry = cache.refresh(entry)
+            return cache.response(entry, response.request)
+
+        if response.ok and cache.storable(response):
+            cache.store(key, response)
+        return response
+
+    def auth_marker(self) -> str:
+        """Return a marker for the login state of the session that is part of
+        the cache key, or "" if the client doesn't log in."""
+        return ""
+
+    def retry_after(self, response: requests.Response) -> float:
+        """Return the seconds to wait from the Retry-After header, or None."""
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return
+
+        if value.strip().isdigit():
+            return float(value)
+
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return
+        return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+    def backoff(self, attempt: int, response: requests.Response = None) -> float:
+        """Return the seconds to wait before retry number attempt.
+
+        Honors Retry-After, otherwise uses exponential backoff with full jitter.
+        """
+        delay = self.retry_after(response)
+        if delay is None:
+            delay = uniform(0, self.BACKOFF_BASE * 2 ** attempt)
+        return min(delay, self.BACKOFF_MAX)
+
+    def retryable(self, response: requests.Response, idempotent: bool) -> bool:
+        """Return True if the request that got response can be retried."""
+        if idempotent:
+            return response.status_code in self.RETRY_STATUSES
+        return (response.status_code in self.RETRY_AFTER_STATUSES
+                and "Retry-After" in response.headers)
+
+    def throttle(self, url) -> None:
+        """Wait until the rate limit for the host of url allows a request."""
+        if not self.RATE_LIMIT:
+            return
+        bucket_for(urlparse(url).netloc, *self.RATE_LIMIT).acquire()
+
+    def send(self, method, url, retries: int = None,
+             **kwargs) -> requests.Response:
+        """Make a rate limited session request, retrying failures.
+
+        For RETRY_METHODS, connection errors and responses with a status in
+        RETRY_STATUSES are retried up to retries times. Other methods are only
+        retried for a status in RETRY_AFTER_STATUSES with a Retry-After header.
+        The last response is returned even if it failed.
+
+        Params
+        ------
+        retries (int, default: MAX_RETRIES): maximum number of retries
+
+        Raises
+        ------
+        RequestError: if the request could not be made
+        """
+        if retries is None:
+            retries = self.MAX_RETRIES
+
+        idempotent = method.upper() in self.RETRY_METHODS
+        for attempt in range(retries + 1):
+            self.throttle(url)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries or not idempotent:
+                    raise RequestError(f"Request to {url} failed: {e}") from e
+                response = None
+            else:
+                if not self.retryable(response, idempotent):
+                    return response
+                if attempt == retries:
+                    return response
+
+            delay = self.backoff(attempt, response)
+            log(prefix=f"{self.__class__.__name__}.send() retrying:", url=url,
+                attempt=attempt + 1, delay=round(delay, 2))
+            sleep(delay)
+
     def request(self, method, url, **kwargs):
-        """Make a session request."""
-        response = self.session.request(method, url, **kwargs)
+        """Make a session request, using the response cache if enabled.
+
+        Raises
+        ------
+        RateLimitedError: if the request was still rate limited after retries
+        RequestError: if the request failed
+        """
+        if (self.cache and method.upper() in self.cache.METHODS
+                and not kwargs.get("stream")):
+            response = self.cached_request(method, url, **kwargs)
+        else:
+            response = self.send(method, url, **kwargs)
         self.responses.append(response)
+
         if not response.ok:
-            abort(
-                f"Request to {url} failed:", "\n",
-                response.status_code, response.reason
+            error = RateLimitedError if response.status_code == 429 else RequestError
+            raise error(
+                f"Request to {url} failed: "
+                f"{response.status_code} {response.reason}",
+                response,
             )
         return response
 
@@ -1,20 +1,30 @@
 """Goodreads client module."""
 
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 from functools import partialmethod
+from itertools import islice
 
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 from more_itertools import first
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
 
-from bookdash import abort, log
+from bookdash import abort, browser_service, log
 from bookdash.books import Book
 from bookdash.browser import Browser
-from bookdash.clients.base_client import BaseClient
-from bookdash.config import Config
+from bookdash.clients.base_client import BaseClient, RequestError
+from bookdash.config import Config, GoodreadsConfig
 from bookdash.cookie_jar import CookieJar
+from bookdash.db import DB
+from bookdash.elements.book_page_element import BookPageElement
 from bookdash.elements.element import Element
 from bookdash.elements.found_book_element import FoundBookElement
+from bookdash.models.book_details import BookDetails
+from bookdash.ranking import Ranker
+from bookdash.timing import PhaseTimer
 
 bp = breakpoint
 
@@ -27,8 +37,52 @@ class GoodreadsClient(BaseClient):
     BASE_URL = "https://goodreads.com"
     COOKIES_FILE = Config().data_dir / "cookies" / "goodreads.pkl"
     BROWSER_DIR = Config().data_dir / "browser"
+    CACHE_FILE = Config().data_dir / "cache" / "goodreads.db"
+
+    RATE_LIMIT = (1.0, 5)
+
+    SESSION_COOKIES = ("session-token",)
+    """Cookies that must be present and unexpired to be logged in."""
+
+    REFRESH_MARGIN = timedelta(days=1)
+    """Log in again when the session cookies expire within this long."""
+
+    SIGNIN_ERRORS = {
+        "signin": ".//div[@id='passkey-error-alert']",
+        "credentials": ".//div[@id='auth-error-message-box']",
+    }
+    """Signin page errors by kind -> xpath."""
+
+    TYPING = None
+    """Browser typing profile used to fill in the signin form, or None to use
+    the typing setting in the goodreads config."""
+
+    MAX_WORKERS = 3
+    """Maximum number of search result pages requested at once."""
+
+    STREAM_CHUNK_SIZE = 16 * 1024
+    """Bytes read from a streamed response at a time."""
+
+    DETAILS_MAX_AGE = timedelta(days=30)
+    """How long parsed book details are read from the database."""
+
+    PREFETCH_LIMIT = 3
+    """Maximum number of books whose details are fetched in the background."""
+
+    PREFETCH_TIMEOUT = 5
+    """Seconds a prefetch request waits for the server, so that quitting
+    isn't held up by requests that are still running."""
+
+    CACHE_TTLS = {
+        "/search": 60 * 60,
+        "/book/show": 7 * 24 * 60 * 60,
+    }
 
     cookie_jar = None
+    ranker = None
+    prefetcher = None
+    prefetched: dict[int, Future] = {}
+    prefetch_file = None
 
     def __init__(self, **kwargs):
         """Goodreads client.
@@ -40,6 +94,7 @@ class GoodreadsClient(BaseClient):
         series (str): series to filter by
         query (str): submit query and return all results
         save (bool): save response content for debugging
+        cache (bool): False to disable the response cache
         """
         self.save = kwargs.pop("save", False)
 
@@ -59,99 +114,437 @@ class GoodreadsClient(BaseClient):
 
         super().__init__(**kwargs)
 
-    def login(self, email, password):
-        """Login to goodreads."""
-        # if we have valid cookies cached, we're already logged in
+    def restore_session(self) -> bool:
+        """Add the cached login cookies to the requests session if they are
+        not due to be refreshed, and return True if they were added.
+
+        Cookies are due to be refreshed if the earliest to expire of
+        SESSION_COOKIES expires within REFRESH_MARGIN.
+        """
         jar = self.cookie_jar = CookieJar(file=self.COOKIES_FILE)
         jar.load()
-        if jar.ok("session-token"):
-            return True
+        margin = self.REFRESH_MARGIN.total_seconds()
+        if not jar.ok(*self.SESSION_COOKIES, margin=margin):
+            return False
+
+        jar.for_session(self.session)
+        return True
+
+    def auth_marker(self) -> str:
+        """Return "session" if the requests session has the SESSION_COOKIES,
+        so that logged in responses are cached apart from anonymous ones."""
+        cookies = self.session.cookies
+        if all(name in cookies for name in self.SESSION_COOKIES):
+            return "session"
+        return ""
+
+    def open_browser(self, typing: str = None) -> Browser:
+        """Return a browser leased from the browser service if it is running,
+        otherwise a new browser.
+
+        Logging in only needs the page and cookies, so requests are not
+        captured.
+
+        Params
+        ------
+        typing (str, default: None): Browser typing profile
+
+        Raises
+        ------
+        ServiceUnavailable: if the service is running but its browser is
+                            busy or failed to start, since it is still using
+                            the browser profile
+        """
+        try:
+            return Browser(lease=browser_service.lease(), typing=typing)
+        except browser_service.ServiceNotRunning:
+            return Browser(user_data_dir=str(self.BROWSER_DIR), capture=False,
+                           typing=typing)
 
-        browser = self.browser = Browser(user_data_dir=str(self.BROWSER_DIR))
+    def login(self, email, password, typing: str = None):
+        """Login to goodreads.
+
+        Cached cookies are used without starting a browser unless they are
+        missing or about to expire. The time each phase takes is recorded in
+        .timer and logged.
+
+        Params
+        ------
+        email (str): goodreads email address
+        password (str): goodreads password
+        typing (str, default: TYPING): Browser typing profile for the form
+        """
+        timer = self.timer = PhaseTimer()
+        try:
+            typing = typing or self.TYPING or GoodreadsConfig().typing
+            return self.sign_in(email, password, typing, timer)
+        finally:
+            log(prefix="GoodreadsClient.login() phases:",
+                total=round(timer.total, 3),
+                **{name: round(secs, 3) for name, secs in timer.phases.items()})
+
+    def sign_in(self, email, password, typing: str, timer: PhaseTimer):
+        """Login to goodreads, recording the time of each phase in timer.
+
+        The browser is always quit, or returned to the browser service, and a
+        leased browser is replaced if the login failed.
+        """
+        # if we have valid cookies cached, we're already logged in
+        with timer.phase("restore session"):
+            if self.restore_session():
+                return True
+
+        with timer.phase("start browser"):
+            browser = self.browser = self.open_browser(typing)
+
+        ok = False
+        try:
+            with timer.phase("start browser"):
+                browser.driver
+            result = self.submit_signin(browser, email, password, timer)
+            ok = True
+            return result
+        finally:
+            browser.quit(ok=ok)
+
+    def submit_signin(self, browser: Browser, email, password,
+                      timer: PhaseTimer):
+        """Fill in and submit the signin form in browser and save the session
+        cookies, recording the time of each phase in timer."""
+        jar = self.cookie_jar
 
         # go to the user-facing signin page
-        browser.get(f"{self.BASE_URL}/user/sign_in")
+        with timer.phase("signin page"):
+            browser.get(f"{self.BASE_URL}/user/sign_in")
 
         # check if the user is already signed in
         # (if they have a session-token cookie and are redirected to the home page)
 
         jar.cookies = browser.get_cookies()
-        if jar.ok("session-token") and browser.current_url == f"{self.BASE_URL}/":
+        if jar.ok(*self.SESSION_COOKIES) and browser.current_url == f"{self.BASE_URL}/":
             jar.save(self.session)
             return True
 
         # click the "Sign in with email" button
-        signin_btn = browser.find_xpath("//button[normalize-space(text())='Sign in with email']")
-        signin_btn.click()
+        with timer.phase("email form"):
+            signin_btn = browser.wait_clickable(
+                "//button[normalize-space(text())='Sign in with email']"
+            )
+            signin_btn.click()
+            email_field = browser.wait_visible(".//input[@name='email']")
 
         #  fill in the form and submit it
-        email_field = browser.find_xpath(".//input[@name='email']")
-        browser.type_slowly(email_field, email)
+        with timer.phase("typing"):
+            browser.type_slowly(email_field, email)
+
+            pwd_field = browser.find_xpath(".//input[@name='password']")
+            browser.type_slowly(pwd_field, password)
 
-        pwd_field = browser.find_xpath(".//input[@name='password']")
-        browser.type_slowly(pwd_field, password)
+        with timer.phase("submit"):
+            signin_url = browser.current_url
+            submit_btn = browser.find_xpath(".//input[@id='signInSubmit']")
+            submit_btn.click()
 
-        submit_btn = browser.find_xpath(".//input[@id='signInSubmit']")
-        submit_btn.click()
+            # wait to be redirected, or for an error on the signin page
+            browser.wait(EC.any_of(
+                EC.url_changes(signin_url),
+                *(EC.visibility_of_element_located((By.XPATH, xpath))
+                  for xpath in self.SIGNIN_ERRORS.values()),
+            ), message="No response to signin.")
 
         # check for normal signin error (ie. wrong password)
-        error = browser.find_xpath(".//div[@id='passkey-error-alert']", quiet=True)
+        error = browser.find_xpath(self.SIGNIN_ERRORS["signin"], quiet=True)
         assert not error or not error.is_displayed(), "Error loading signin page."
 
         # look for driver-related errors (ie. Javascript disabled)
-        error = browser.find_xpath(".//div[@id='auth-error-message-box']", quiet=True)
+        error = browser.find_xpath(self.SIGNIN_ERRORS["credentials"], quiet=True)
         assert not error or not error.is_displayed(), "Error submitting credentials."
 
         # look for CAPTCHA
         assert browser.driver.title != f"Authentication required", "Problem submitting signin (possibly CAPTCHA)."
 
-        # save the cookies
-        jar.cookies = browser.get_cookies()
-        jar.save(self.session)
+        # wait for the session cookies that mean we're logged in, then save them
+        with timer.phase("session cookie"):
+            for name in self.SESSION_COOKIES:
+                browser.wait_cookie(name)
+            jar.cookies = browser.get_cookies()
+            jar.save(self.session)
 
-        current_url = browser.current_url
-        browser.quit()
-        return current_url
+        return browser.current_url
 
-    def search(self) -> list:
-        """Submit a query to goodreads and return a list of Book objects."""
+    def search_params(self) -> dict:
+        """Return the request params for the search query."""
         query = " ".join(self.query.values())
-        response = self.get(
-            "https://www.goodreads.com/search",
-            params={'q': query, 'search[field]': self.search_by}
-        )
+        return {'q': query, 'search[field]': self.search_by}
+
+    def found_book(self, elm) -> Book:
+        """Return a scored Book for a search results row element."""
+        book = Book(FoundBookElement(elm))
+        book.match(self.query)
+        return book
+
+    def search_page(self, page: int = 1) -> tuple[list, int]:
+        """Request a page of search results.
+
+        Return a list of scored Book objects, in page order, and the number
+        of the last page of results.
+        """
+        params = self.search_params()
+        query = params["q"]
+        if page > 1:
+            params["page"] = page
+        response = self.get("https://www.goodreads.com/search", params=params)
 
         # log(path_url=response.request.path_url)
         log(url=response.url)
         log(
-            prefix="{self.__class__.__name__}.search() query:", query=query,
-            search_by=self.search_by
+            prefix=f"{self.__class__.__name__}.search() query:", query=query,
+            search_by=self.search_by, page=page
         )
 
         doc = Element(response.text)
         if self.save:
-            with open("goodreads-search.html", "w") as fp:
+            name = "goodreads-search.html" if page == 1 else \
+                f"goodreads-search-{page}.html"
+            with open(name, "w") as fp:
+                fp.write(response.text)
+
+        # each row is read in place from the parsed document
+        books = [
+            Book(FoundBookElement(elm))
+            for elm in FoundBookElement.selector("rows")(doc.element)
+        ]
+        Book.match_all(books, self.query)
+
+        numbers = [
+            int(text) for text in FoundBookElement.selector("pages")(doc.element)
+            if text.strip().isdigit()
+        ]
+        return books, max(numbers, default=page)
+
+    def search(self, limit: int = None, pages: int = 1,
+               workers: int = None) -> list:
+        """Submit a query to goodreads and return a list of the best matching
+        Book objects, best match first.
+
+        When more than one page is requested, the rest are fetched
+        concurrently once the first page has been read, unless it already
+        has good enough matches. Each page is ranked as it arrives, and no
+        more pages are requested once the ranker is satisfied.
+
+        Params
+        ------
+        limit (int, default: Ranker.LIMIT): maximum number of books to return
+        pages (int, default: 1): maximum number of result pages to fetch
+        workers (int, default: MAX_WORKERS): maximum concurrent requests
+        """
+        ranker = self.ranker = Ranker(limit)
+        seen = set()
+
+        def merge(books):
+            # results can shift between pages while they are being requested
+            new = [book for book in books if book.id not in seen]
+            seen.update(book.id for book in new)
+            ranker.extend(new)
+
+        books, last = self.search_page(1)
+        merge(books)
+
+        remaining = range(2, min(pages, last) + 1)
+        if not remaining or ranker.satisfied:
+            return ranker.results()
+
+        workers = min(workers or self.MAX_WORKERS, len(remaining))
+        pending = iter(remaining)
+
+        # a page is only submitted when another finishes, so that no more
+        # requests are made once the ranker is satisfied
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        def submit(count):
+            return {
+                executor.submit(self.search_page, page)
+                for page in islice(pending, count)
+            }
+
+        running = set()
+        try:
+            running = submit(workers)
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    books, _ = future.result()
+                    merge(books)
+
+                if ranker.satisfied:
+                    break
+                running |= submit(len(done))
+        finally:
+            # don't wait for the pages still being requested once satisfied
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return ranker.results()
+
+    def iter_search(self):
+        """Submit a query to goodreads and yield a Book for each result row as
+        soon as it has been downloaded, in page order.
+
+        The response is streamed into an incremental parser instead of being
+        read in full, so it is never cached.
+        """
+        for books in self.iter_search_batches():
+            yield from books
+
+    def iter_search_batches(self):
+        """Like .iter_search(), but yield a list of the Books for the result
+        rows completed by each chunk of the response that completes any."""
+        params = self.search_params()
+        response = self.get(
+            "https://www.goodreads.com/search", params=params, stream=True
+        )
+        log(url=response.url)
+        log(
+            prefix=f"{self.__class__.__name__}.iter_search() query:",
+            query=params["q"], search_by=self.search_by
+        )
+
+        parser = etree.HTMLPullParser(
+            events=("end",), tag="tr", encoding=response.encoding
+        )
+        fp = open("goodreads-search.html", "wb") if self.save else None
+
+        def closed_rows():
+            return [
+                self.found_book(elm) for _, elm in parser.read_events()
+                if elm.get("itemtype") == FoundBookElement.ROW_TYPE
+            ]
+
+        try:
+            for chunk in response.iter_content(self.STREAM_CHUNK_SIZE):
+                if fp:
+                    fp.write(chunk)
+                parser.feed(chunk)
+                if books := closed_rows():
+                    yield books
+
+            parser.close()
+            if books := closed_rows():
+                yield books
+        finally:
+            response.close()
+            if fp:
+                fp.close()
+
+    def show(self, book_id, db: DB = None,
+             max_age: timedelta = None) -> BookDetails:
+        """Return the details for a book by ID.
+
+        Details fetched less than max_age ago are read from the book_details
+        table, otherwise the book page is requested, parsed and stored. If
+        the book is being prefetched into the same database with the default
+        max_age, that result is waited for instead, unless the prefetch
+        request failed.
+
+        Params
+        ------
+        book_id (int, str): goodreads book id
+        db (DB, default: DB()): database the details are stored in
+        max_age (timedelta, default: DETAILS_MAX_AGE): how old stored details
+                can be before the book page is requested again
+        """
+        book_id = int(book_id)
+        db = db or DB()
+
+        future = self.prefetched.get(book_id)
+        if (future and not future.cancelled()
+                and db.DB_FILE.absolute() == self.prefetch_file
+                and max_age in (None, self.DETAILS_MAX_AGE)):
+            try:
+                return future.result()
+            except RequestError as e:
+                # prefetches give up quickly, so try again normally
+                log(prefix=f"{self.__class__.__name__}.show() prefetch failed:",
+                    book_id=book_id, error=str(e))
+
+        db.create()
+        return self.fetch_details(book_id, db, max_age)
+
+    def fetch_details(self, book_id: int, db: DB, max_age: timedelta = None,
+                      **kwargs) -> BookDetails:
+        """Return the stored details for a book by ID if they are fresh,
+        otherwise request, parse and store them.
+
+        The book_details table must already exist. Any other keyword arguments
+        are passed to the request.
+        """
+        if max_age is None:
+            max_age = self.DETAILS_MAX_AGE
+
+        stored = db.select_one(BookDetails, BookDetails.id == book_id)
+        if stored and stored.fresh(max_age):
+            return stored
+
+        response = self.get(
+            f"https://www.goodreads.com/book/show/{book_id}", **kwargs
+        )
+        log(url=response.url)
+
+        if self.save:
+            with open(f"goodreads-book-{book_id}.html", "w") as fp:
                 fp.write(response.text)
 
-        books = []
-        for elm in doc.xpath('//tr[@itemtype="http://schema.org/Book"]'):
-            found_book = FoundBookElement(elm)
-            book = Book(elm, id=found_book.id)
-            book.match(self.query)
-            books.append(book)
-
-        books = sorted(books, key=lambda b: b.score, reverse=True)
-        threshold = 1
-        matches = None
-        #  while not matches:
-        #      matches = [b for b in books if b.score >= threshold]
-        #      if threshold <= 0:
-        #          break
-        #      threshold -= 0.15
-
-        #  books = matches
-        return books
-
-    def show(self):
-        """Submit a request to show a book by ID and return the details for
-        that book."""
+        elm = BookPageElement(response.text)
+        details = BookDetails.from_details({**elm.details(), "id": book_id})
+
+        with db.session_scope() as session:
+            details = session.merge(details)
+        return details
+
+    def prefetch(self, book_ids, db: DB = None,
+                 workers: int = None) -> dict[int, Future]:
+        """Start fetching the details of up to PREFETCH_LIMIT books in the
+        background, so that show() can return them without waiting.
+
+        Call stop_prefetch() to cancel the fetches that have not started.
+        Prefetch requests are not retried and time out after
+        PREFETCH_TIMEOUT seconds, so the ones in progress end soon after.
+
+        Params
+        ------
+        book_ids (Iterable): goodreads book ids, most likely to be shown first
+        db (DB, default: DB()): database the details are stored in
+        workers (int, default: MAX_WORKERS): maximum concurrent requests
+        """
+        self.stop_prefetch()
+
+        ids = list(dict.fromkeys(
+            int(book_id) for book_id in book_ids if book_id is not None
+        ))[:self.PREFETCH_LIMIT]
+        if not ids:
+            return {}
+
+        db = db or DB()
+        db.create()
+
+        executor = self.prefetcher = ThreadPoolExecutor(
+            max_workers=min(workers or self.MAX_WORKERS, len(ids))
+        )
+        self.prefetch_file = db.DB_FILE.absolute()
+        self.prefetched = {
+            book_id: executor.submit(
+                self.fetch_details, book_id, db,
+                timeout=self.PREFETCH_TIMEOUT, retries=0,
+            )
+            for book_id in ids
+        }
+        return self.prefetched
+
+    def stop_prefetch(self) -> None:
+        """Cancel the prefetches that have not started, without waiting for
+        the ones in progress."""
+        if not self.prefetcher:
+            return
+        self.prefetcher.shutdown(wait=False, cancel_futures=True)
+        self.prefetcher, self.prefetched, self.prefetch_file = None, {}, None
@@ -0,0 +1,71 @@
+"""Module for limiting the rate of requests to each host."""
+
+from threading import Lock
+from time import monotonic, sleep
+
+bp = breakpoint
+
+__all__ = ["TokenBucket", "bucket_for"]
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Up to burst requests can be made at once, after which requests are
+    allowed at rate per second.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Token bucket.
+
+        Params
+        ------
+        rate (float): tokens added per second
+        burst (int, default: 1): maximum number of tokens
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def __repr__(self):
+        """TokenBucket class repr."""
+        return f"TokenBucket <rate={self.rate}, burst={self.burst}>"
+
+    def refill(self) -> None:
+        """Add the tokens earned since the last update."""
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Take a token if one is available, otherwise return the number of
+        seconds until one will be."""
+        with self.lock:
+            self.refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available and return the seconds waited."""
+        waited = 0.0
+        while (delay := self.wait_time()):
+            sleep(delay)
+            waited += delay
+        return waited
+
+
+_buckets: dict[tuple, TokenBucket] = {}
+_buckets_lock = Lock()
+
+
+def bucket_for(host: str, rate: float, burst: int = 1) -> TokenBucket:
+    """Return the process-wide TokenBucket for host."""
+    key = (host, rate, burst)
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(rate, burst)
+        return _buckets[key]
@@ -0,0 +1,206 @@
+"""Module for a disk-backed HTTP response cache."""
+
+import json
+from hashlib import sha256
+from pathlib import Path
+from time import time
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from sqlalchemy import delete, func
+from sqlmodel import select
+
+from bookdash.db import DB
+from bookdash.models.cached_response import CachedResponse
+
+bp = breakpoint
+
+__all__ = ["ResponseCache"]
+
+
+class ResponseCache:
+    """Store responses in an SQLite file and serve them until they expire.
+
+    Stale responses that have an ETag or Last-Modified header are revalidated
+    with a conditional request instead of being downloaded again, and the
+    least recently used responses are evicted when the cache grows past
+    max_size bytes. Responses marked no-store or private are not stored.
+    """
+
+    DEFAULT_TTL = 60 * 60
+    """Seconds a response is fresh for if its URL path is not in ttls."""
+
+    MAX_SIZE = 50 * 1024 * 1024
+    """Maximum total bytes of cached content."""
+
+    METHODS = ("GET", "HEAD")
+    """Request methods that may be cached."""
+
+    # headers that no longer apply to the stored (decoded) content
+    DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+    NO_STORE = ("no-store", "private")
+    """Cache-Control directives of responses that are not stored."""
+
+    def __init__(self, file: Path, ttls: dict = None, default_ttl: int = None,
+                 max_size: int = None):
+        """Response cache.
+
+        Params
+        ------
+        file (Path): sqlite file to store responses in
+        ttls (dict): URL path prefix -> seconds a response is fresh for
+        default_ttl (int, default: DEFAULT_TTL): seconds for other paths
+        max_size (int, default: MAX_SIZE): maximum total bytes of content
+        """
+        self.db = DB(file)
+        self.ttls = ttls or {}
+        self.default_ttl = self.DEFAULT_TTL if default_ttl is None else default_ttl
+        self.max_size = max_size or self.MAX_SIZE
+        CachedResponse.metadata.create_all(self.db.engine)
+
+    def __repr__(self):
+        """ResponseCache class repr."""
+        return f"ResponseCache <file={self.db.DB_FILE.name!r}>"
+
+    def key(self, method: str, url: str, params: dict = None,
+            auth: str = "") -> str:
+        """Return the cache key for a request.
+
+        Params
+        ------
+        method (str): request method
+        url (str): request URL
+        params (dict, default: None): query string params
+        auth (str, default: ""): marker for the login state of the request, so
+             that logged in and anonymous responses are stored separately
+        """
+        request = requests.Request(method.upper(), url, params=params).prepare()
+        return sha256(
+            f"{request.method} {request.url} {auth}".encode()
+        ).hexdigest()
+
+    def storable(self, response: requests.Response) -> bool:
+        """Return False if the response's Cache-Control forbids storing it."""
+        directives = {
+            directive.strip().split("=")[0].lower()
+            for directive in response.headers.get("Cache-Control", "").split(",")
+        }
+        return not directives.intersection(self.NO_STORE)
+
+    def ttl(self, url: str) -> int:
+        """Return the seconds responses for url are fresh for.
+
+        The longest path prefix in ttls that url starts with is used.
+        """
+        path = urlparse(url).path
+        matches = [prefix for prefix in self.ttls if path.startswith(prefix)]
+        if not matches:
+            return self.default_ttl
+        return self.ttls[max(matches, key=len)]
+
+    def fresh(self, entry: CachedResponse) -> bool:
+        """Return True if entry has not expired."""
+        return time() - entry.stored_at < self.ttl(entry.url)
+
+    def get(self, key: str) -> CachedResponse:
+        """Return the entry for key, or None, and mark it as recently used."""
+        with self.db.session_scope() as session:
+            entry = session.get(CachedResponse, key)
+            if entry:
+                entry.accessed_at = time()
+        return entry
+
+    def validators(self, entry: CachedResponse) -> dict:
+        """Return the conditional request headers to revalidate entry."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: str, response: requests.Response) -> CachedResponse:
+        """Save response under key and evict old entries if needed."""
+        headers = {
+            k: v for k, v in response.headers.items()
+            if k.lower() not in self.DROP_HEADERS
+        }
+        content = response.content or b""
+        now = time()
+
+        entry = CachedResponse(
+            key=key,
+            method=response.request.method,
+            url=response.url,
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=json.dumps(headers),
+            content=content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            size=len(content),
+            stored_at=now,
+            accessed_at=now,
+        )
+        with self.db.session_scope() as session:
+            session.merge(entry)
+
+        self.evict()
+        return entry
+
+    def refresh(self, entry: CachedResponse) -> CachedResponse:
+        """Mark entry as fresh again after a 304 Not Modified response."""
+        with self.db.session_scope() as session:
+            entry = session.merge(entry)
+            entry.stored_at = entry.accessed_at = time()
+        return entry
+
+    def size(self) -> int:
+        """Return the total bytes of cached content."""
+        with self.db.session_scope() as session:
+            return session.exec(select(func.sum(CachedResponse.size))).one() or 0
+
+    def evict(self) -> int:
+        """Delete least recently used entries until under max_size.
+
+        Return the number of entries deleted.
+        """
+        excess = self.size() - self.max_size
+        if excess <= 0:
+            return 0
+
+        keys = []
+        with self.db.session_scope() as session:
+            query = select(CachedResponse.key, CachedResponse.size) \
+                .order_by(CachedResponse.accessed_at)
+            for key, size in session.exec(query):
+                if excess <= 0:
+                    break
+                keys.append(key)
+                excess -= size
+
+            session.exec(delete(CachedResponse).where(CachedResponse.key.in_(keys)))
+
+        return len(keys)
+
+    def clear(self) -> None:
+        """Delete all entries."""
+        with self.db.session_scope() as session:
+            session.exec(delete(CachedResponse))
+
+    def response(self, entry: CachedResponse,
+                 request: requests.PreparedRequest = None) -> requests.Response:
+        """Return a requests Response built from entry."""
+        response = requests.Response()
+        response.status_code = entry.status_code
+        response.reason = entry.reason
+        response.headers = CaseInsensitiveDict(json.loads(entry.headers))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry.url
+        response._content = entry.content
+        response.request = request
+        response.from_cache = True
+        return response
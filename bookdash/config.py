@@ -1,6 +1,6 @@
 from os import environ
 from pathlib import Path
-from typing import Optional, Union
+from typing import Literal, Optional, Union
 
 import toml
 from confz import BaseConfig, EnvSource, FileSource
@@ -74,6 +74,8 @@ def init_config(path: Path) -> None:
         "# - XDG_DATA_HOME:         User data directory.",
         "# - GOODREADS_EMAIL:       Your goodreads email address.",
         "# - GOODREADS_PWD:         Your goodreads password.",
+        "# - GOODREADS_TYPING:      How fast to type the login form:",
+        "#                          human, quick or fast.",
         "",
     )
 
@@ -168,6 +170,7 @@ class GoodreadsConfig(BaseConfig):
 
     email: Optional[EmailStr] = None
     pwd: Optional[str] = None
+    typing: Literal["human", "quick", "fast"] = "human"
 
     CONFIG_SOURCES = [
         *DEFAULT_SOURCES,
@@ -58,16 +58,26 @@ class CookieJar():
         self._cookies = cookies
         return self._cookies
 
-    def expired(self) -> bool:
-        """Return True if any cookies are expired."""
+    def expires_at(self, *names) -> Optional[float]:
+        """Return the earliest expiry timestamp of the cookies for names, or
+        of all cookies if no names are given, or None if none expire."""
+        cookies = self.cookies or {}
+        if names:
+            cookies = {name: cookies[name] for name in names if name in cookies}
+        expiries = [
+            float(c["expiry"]) for c in cookies.values() if c.get("expiry")
+        ]
+        return min(expiries, default=None)
+
+    def expired(self, *names, margin: float = 0) -> bool:
+        """Return True if any cookies for names, or any cookies if no names are
+        given, are expired or will expire within margin seconds."""
         if not self.cookies:
             return False
-        now = datetime.today().timestamp()
-        expired = list(filter(
-            lambda c: now >= c.get("expiry", now + 1),
-            self.cookies.values())
-        )
-        return bool(expired)
+        expires_at = self.expires_at(*names)
+        if expires_at is None:
+            return False
+        return datetime.today().timestamp() + margin >= expires_at
 
     def has(self, *names) -> bool:
         """Return True if cookies for all names exist."""
@@ -77,10 +87,14 @@ class CookieJar():
         return all(have)
 
     def for_session(self, session: Session) -> CookiesList:
-        """Prepare cookies and add to session."""
+        """Prepare copies of the cookies and add them to session.
+
+        The cookies in the jar are left in the format they were saved in.
+        """
 
         session_cookies = []
         for cookie in self.cookies.values():
+            cookie = cookie.copy()
             cookie.pop("sameSite", None)
 
             if "httpOnly" in cookie:
@@ -119,7 +133,10 @@ class CookieJar():
         if session:
             self.for_session(session)
 
-    def ok(self, *names) -> bool:
-        """Return True if no cookies are expired and the required cookies are
-        present."""
-        return (not self.expired()) and (self.has(*names))
+    def ok(self, *names, margin: float = 0) -> bool:
+        """Return True if the required cookies are present and none of them
+        expire within margin seconds.
+
+        If no names are given, no cookies may be expired.
+        """
+        return (not self.expired(*names, margin=margin)) and (self.has(*names))
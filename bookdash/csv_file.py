@@ -1,25 +1,84 @@
 from collections import UserList
-from csv import DictReader, register_dialect
+from csv import DictReader, reader, register_dialect
+from mmap import ACCESS_READ, mmap
 from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from more_itertools import chunked
 
 register_dialect('custom_dialect', skipinitialspace=True)
 
 
 class CsvFile(UserList):
-    """A CSV file that operates as a list and each row is represented as a dictoinary."""
+    """A CSV file that operates as a list and each row is represented as a dictoinary.
+
+    When lazy is True rows are streamed from the file instead of being held in
+    memory: iterating reads the file row by row and len() counts rows without
+    keeping them.
+    """
+
+    ENCODING = "utf-8-sig"
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, lazy=False):
         self.filepath = Path(filepath)
         self.loaded = False
+        self.lazy = lazy
+        self._count = None
+        self.headings = None
         super().__init__()
 
     def __repr__(self):
         return f"CsvFile <name={self.filepath.name!r}, loaded={self.loaded}, lines={len(self)}>"
 
+    def __len__(self):
+        if self.lazy and not self.loaded:
+            return self.count()
+        return super().__len__()
+
+    def __iter__(self):
+        if self.lazy and not self.loaded:
+            return self.stream()
+        return super().__iter__()
+
+    def lines(self) -> Iterator[str]:
+        """Yield decoded lines from the memory-mapped file."""
+        with open(self.filepath, "rb") as fp:
+            # mmap cannot map an empty file
+            if not fp.seek(0, 2):
+                return
+            with mmap(fp.fileno(), 0, access=ACCESS_READ) as mm:
+                for line in iter(mm.readline, b""):
+                    yield line.decode(self.ENCODING)
+
+    def stream(self, chunk_size: Optional[int] = None, raw: bool = False) -> Iterator[Union[dict, list]]:
+        """Yield each row as a dictionary without loading the whole file.
+
+        Params
+        ------
+        chunk_size (int, optional): yield lists of up to chunk_size rows instead
+        raw (bool, default=False): yield each row as a list of values, and
+                                   store the heading row at .headings
+        """
+        if raw:
+            rows = reader(self.lines(), dialect="custom_dialect")
+            self.headings = next(rows, [])
+            rows = filter(None, rows)
+        else:
+            rows = DictReader(self.lines(), dialect="custom_dialect")
+
+        if chunk_size:
+            return chunked(rows, chunk_size)
+        return iter(rows)
+
+    def count(self) -> int:
+        """Return the number of rows in the file, not including the heading."""
+        if self._count is None:
+            rows = reader(self.lines(), dialect="custom_dialect")
+            # blank lines are skipped by DictReader so don't count them here
+            self._count = max(sum(1 for row in rows if row) - 1, 0)
+        return self._count
+
     def read(self):
-        with open(Path(self.filepath)) as fp:
-            reader = DictReader(fp, dialect="custom_dialect")
-            for row in reader:
-                #  breakpoint()
-                self.append(row)
+        for row in self.stream():
+            self.append(row)
         self.loaded = True
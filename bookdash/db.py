@@ -1,7 +1,13 @@
 """Database module."""
 
-from functools import cached_property
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Iterable
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql.elements import ClauseElement
 from sqlmodel import Field, Session, SQLModel, create_engine, select
 
@@ -9,6 +15,47 @@ from bookdash.config import Config
 
 bp = breakpoint
 
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    # negative values are in KiB, so this is a 64MB page cache
+    "cache_size": -64000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+"""Pragmas run on every new sqlite connection."""
+
+POOL_SIZE = 5
+"""Number of connections kept open in each engine's pool."""
+
+_engines: dict[Path, Engine] = {}
+"""Process-wide engines mapped by absolute database file path."""
+
+_engines_lock = Lock()
+
+_created: set[Path] = set()
+"""Absolute database file paths whose tables have been created this process."""
+
+_created_lock = Lock()
+
+
+def set_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply PRAGMAS to a new sqlite connection."""
+    cursor = dbapi_connection.cursor()
+    for name, value in PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def dispose_engines() -> None:
+    """Close and forget all cached engines and created databases."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+    with _created_lock:
+        _created.clear()
+
 
 class DB():
     """Database class."""
@@ -17,6 +64,11 @@ class DB():
 
     DB_FILE = Config().data_dir / "library.db"
 
+    def __init__(self, file: Path = None):
+        """Database for file, defaults to DB_FILE."""
+        if file:
+            self.DB_FILE = Path(file)
+
     @property
     def sqlite_url(self):
         """Return the sqlite database URL.
@@ -28,29 +80,105 @@ class DB():
         return sqlite_url
 
     @property
-    def engine(self):
-        """Return a database engine."""
-        self.DB_FILE.parent.mkdir(parents=True, exist_ok=True)
-        return create_engine(
-            self.sqlite_url,
-            connect_args={"check_same_thread": False},
-            #  echo=True,
-        )
+    def engine(self) -> Engine:
+        """Return the shared database engine for DB_FILE.
+
+        Engines are created once per database file and cached for the life of
+        the process so that the connection pool is reused between sessions.
+        """
+        key = self.DB_FILE.absolute()
+        with _engines_lock:
+            if (engine := _engines.get(key)):
+                return engine
+
+            self.DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+            engine = create_engine(
+                self.sqlite_url,
+                connect_args={"check_same_thread": False},
+                poolclass=QueuePool,
+                pool_size=POOL_SIZE,
+                #  echo=True,
+            )
+            event.listen(engine, "connect", set_pragmas)
+            _engines[key] = engine
+
+        return engine
 
     @property
     def session(self):
         """Return the database session."""
         return Session(self.engine)
 
+    @contextmanager
+    def session_scope(self):
+        """Provide a transactional session on a pooled connection.
+
+        Commits if the block completes, otherwise rolls back and re-raises.
+
+        Example:
+            >>> with DB().session_scope() as session:  # doctest: +SKIP
+            ...     session.add(book)
+        """
+        session = Session(self.engine, expire_on_commit=False)
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     def create(self):
-        """Create SQL database and tables."""
-        SQLModel.metadata.create_all(self.engine)
+        """Create SQL database and tables.
+
+        This is only done once per database file in a process, so it is cheap
+        to call before each use.
+        """
+        key = self.DB_FILE.absolute()
+        with _created_lock:
+            if key in _created:
+                return
+            SQLModel.metadata.create_all(self.engine)
+            self.migrate()
+            _created.add(key)
+
+    def migrate(self):
+        """Add columns that are missing from existing tables.
+
+        create_all() only creates missing tables, so model fields added after
+        a table was created are added here as nullable columns.
+        """
+        with self.engine.begin() as conn:
+            for table in SQLModel.metadata.sorted_tables:
+                result = conn.exec_driver_sql(f"PRAGMA table_info({table.name})")
+                existing = {row[1] for row in result}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    kind = column.type.compile(dialect=conn.dialect)
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {kind}"
+                    )
 
     def select_one(self, model: type, *conditions: ClauseElement) -> dict:
         """Return one row or empty dictionary from the database."""
-        with self.session as session:
+        with self.session_scope() as session:
             query = select(model).where(*conditions)
             results = session.exec(query)
             row = results.one_or_none() or {}
 
         return row
+
+    def select_by_ids(self, model: type, ids: Iterable) -> dict:
+        """Return the rows with a primary key in ids, mapped by id.
+
+        All rows are selected in a single query.
+        """
+        ids = {int(i) for i in ids if i is not None}
+        if not ids:
+            return {}
+
+        with self.session_scope() as session:
+            query = select(model).where(model.id.in_(ids))
+            return {row.id: row for row in session.exec(query)}
@@ -1,33 +1,201 @@
 """A module for parsing book data from the a Goodreads search results row."""
 
+import json
 import re
+from datetime import datetime, timezone
 from functools import cached_property
 
 from more_itertools import first
 
 from .book_element import BookElement
+from .element import Element
 
 __all__ = ["BookPageElement"]
 
 
 class BookPageElement(BookElement):
-    """A class for parsing book data from Goodreads book page."""
+    """A class for parsing book data from Goodreads book page.
+
+    The current book page embeds its data as JSON in a script tag, which is
+    found with a string search and decoded once. The page is only parsed if
+    there is no JSON or a field is missing from it, and selectors match
+    both the current book page and the older one, which uses schema.org
+    microdata.
+    """
+
+    DATA_MARKER = '<script id="__NEXT_DATA__" type="application/json">'
+    """Opening tag of the script containing the page data."""
 
     ID_MATCHER = re.compile(r"(?P<id>\d+)[^/]*$")
 
+    PAGES_MATCHER = re.compile(r"^(?:(?P<pages>\d+) pages)?(?:,? ?(?P<format>.+))?$")
+
+    SELECTORS = {
+        "title": "(//title)[1]/text()",
+        "canonical": "//link[@rel='canonical']/@href",
+        "author": (
+            '(//span[@data-testid="name"])[1]/text()'
+            ' | (//span[@itemprop="author"]//span[@itemprop="name"])[1]/text()'
+        ),
+        "rating": (
+            '//div[@class="RatingStatistics__rating"]/text()'
+            ' | //span[@itemprop="ratingValue"]/text()'
+        ),
+        "ratings_count": (
+            '//span[@data-testid="ratingsCount"]/text()'
+            ' | //meta[@itemprop="ratingCount"]/@content'
+        ),
+        "pages_format": (
+            '//p[@data-testid="pagesFormat"]/text()'
+            ' | //span[@itemprop="numberOfPages"]/text()'
+        ),
+        "format": '//span[@itemprop="bookFormat"]/text()',
+        "publication": (
+            '//p[@data-testid="publicationInfo"]/text()'
+            ' | //div[@id="details"]/div[@class="row"][2]/text()'
+        ),
+        "genres": (
+            '//div[@data-testid="genresList"]'
+            '//span[@class="BookPageMetadataSection__genreButton"]//text()'
+            ' | //div[@class="left"]/a[contains(@class, "bookPageGenreLink")]/text()'
+        ),
+    }
+
+    DETAILS = (
+        "id", "title", "author", "series", "number", "rating", "ratings_count",
+        "pages", "format", "publication", "genres",
+    )
+    """Names of the attributes parsed from the page."""
+
     def __init__(self, element=None):
-        """Parse book attributes from element."""
-        super().__init__(element)
-        self.title = self.doc.title.text.removesuffix(" | Goodreads")
+        """Parse book attributes from element, or from the page data if
+        element is page markup that contains it."""
+        data = self.page_data(element) if isinstance(element, str) else {}
+        if data:
+            # the markup is only parsed if a field is missing from data
+            super().__init__()
+            self._raw = element
+        else:
+            super().__init__(element)
+        self.data = data
+
+        if "title" in data:
+            self._title = data["title"]
+            self.series = data.get("series")
+            self.number = data.get("number")
+            self.author = data.get("author") or self.text("author")
+            return
+
+        if self.doc is None:
+            return
+
+        title = first(self.xpath("title", self.doc), "")
+        self.title = title.removesuffix(" | Goodreads")
+
+        # the title is only parsed for the author if it has a series
+        if not self.author and (author := self.text("author")):
+            self.author = author
+            self._title = self._title.removesuffix(f" by {author}")
+
+    @classmethod
+    def page_data(cls, text: str) -> dict:
+        """Return the book attributes in the JSON page data of text, or {}.
+
+        Params
+        ------
+        text (str): book page markup
+        """
+        start = text.find(cls.DATA_MARKER)
+        if start == -1:
+            return {}
+        start += len(cls.DATA_MARKER)
+        end = text.find("</script>", start)
+
+        try:
+            state = json.loads(text[start:end])["props"]["pageProps"]["apolloState"]
+            ref = first(
+                value for key, value in state["ROOT_QUERY"].items()
+                if key.startswith("getBookByLegacyId")
+            )
+            book = state[ref["__ref"]]
+        except (ValueError, KeyError, TypeError, StopIteration):
+            return {}
+
+        def deref(obj) -> dict:
+            """Return the object that obj references in state, or {}."""
+            return state.get((obj or {}).get("__ref"), {})
+
+        details = book.get("details") or {}
+        work = deref(book.get("work"))
+        stats = work.get("stats") or {}
+        series = first(book.get("bookSeries") or [], {})
+        number = series.get("userPosition")
+        contributor = (book.get("primaryContributorEdge") or {}).get("node")
+
+        data = {
+            "id": book.get("legacyId"),
+            "title": book.get("title"),
+            "author": deref(contributor).get("name"),
+            "series": deref(series.get("series")).get("title"),
+            "number": int(number) if str(number).isnumeric() else number,
+            "rating": stats.get("averageRating"),
+            "ratings_count": stats.get("ratingsCount"),
+            "pages": details.get("numPages"),
+            "format": details.get("format"),
+            "publication": cls.publication_text(work.get("details"), details),
+            "genres": list(dict.fromkeys(
+                genre["genre"]["name"] for genre in book.get("bookGenres") or []
+                if (genre.get("genre") or {}).get("name")
+            )),
+        }
+        return {name: value for name, value in data.items() if value}
+
+    @staticmethod
+    def publication_text(work_details: dict, details: dict) -> str:
+        """Return the publication info shown on the page, ie "First published
+        February 5, 2013", from the work and edition details."""
+        if (time := (work_details or {}).get("publicationTime")):
+            prefix = "First published"
+        elif (time := (details or {}).get("publicationTime")):
+            prefix = "Published"
+        else:
+            return
+
+        date = datetime.fromtimestamp(time / 1000, timezone.utc)
+        return f"{prefix} {date:%B} {date.day}, {date.year}"
+
+    @cached_property
+    def doc(self):
+        """Return the root element of the document, parsing the markup the
+        first time if the fields were read from the page data."""
+        if self.element is None and self.data:
+            self.element = Element(self._raw).element
+        if self.element is None:
+            return
+        return self.element.getroottree().getroot()
+
+    def text(self, path) -> str:
+        """Return the first text for path with whitespace collapsed, or None.
+        """
+        if self.doc is None:
+            return
+        text = first(self.xpath(path, self.doc), None)
+        if text is None:
+            return
+        return " ".join(text.split()) or None
 
     @cached_property
     def id(self):
         """Return the book id, parsed from the canonical link href."""
-        link = first(self.doc.find_all("link", rel="canonical"))
-        if not link:
+        if "id" in self.data:
+            return self.data["id"]
+        if self.doc is None:
+            return
+
+        href = first(self.xpath("canonical", self.doc), None)
+        if not href:
             return
 
-        href = link.attrs.get("href", "")
         res = self.ID_MATCHER.search(href)
         if not res:
             return
@@ -35,6 +203,68 @@ class BookPageElement(BookElement):
         return int(res.group("id"))
 
     @cached_property
-    def rating(self):
-        """Return the rating parsed from the page."""
+    def rating(self) -> float:
+        """Return the average rating parsed from the page."""
+        if "rating" in self.data:
+            return self.data["rating"]
+        if self.doc is None or not (text := self.text("rating")):
+            return
+        return float(text)
+
+    @cached_property
+    def ratings_count(self) -> int:
+        """Return the number of ratings parsed from the page."""
+        if "ratings_count" in self.data:
+            return self.data["ratings_count"]
+        if self.doc is None or not (text := self.text("ratings_count")):
+            return
+        return int(text.replace(",", ""))
+
+    @cached_property
+    def pages_format(self) -> dict:
+        """Return the number of pages and format, ie "388 pages, Hardcover"."""
+        if self.doc is None or not (text := self.text("pages_format")):
+            return {}
+        match = self.PAGES_MATCHER.search(text)
+        return match.groupdict() if match else {}
+
+    @cached_property
+    def pages(self) -> int:
+        """Return the number of pages parsed from the page."""
+        if "pages" in self.data:
+            return self.data["pages"]
+        pages = self.pages_format.get("pages")
+        return int(pages) if pages else None
+
+    @cached_property
+    def format(self) -> str:
+        """Return the binding format parsed from the page."""
+        if "format" in self.data:
+            return self.data["format"]
+        if self.doc is None:
+            return
+        return self.pages_format.get("format") or self.text("format")
+
+    @cached_property
+    def publication(self) -> str:
+        """Return the publication date and publisher parsed from the page."""
+        if "publication" in self.data:
+            return self.data["publication"]
+        if self.doc is None:
+            return
+        return self.text("publication")
+
+    @cached_property
+    def genres(self) -> list[str]:
+        """Return the list of genres parsed from the page."""
+        if "genres" in self.data:
+            return self.data["genres"]
+        if self.doc is None:
+            return []
+        names = (" ".join(text.split()) for text in self.xpath("genres", self.doc))
+        # the old page lists sub-genres as "Fantasy > Paranormal"
+        return list(dict.fromkeys(name for name in names if name))
 
+    def details(self) -> dict:
+        """Return a dictionary of the book attributes parsed from the page."""
+        return {name: getattr(self, name, None) for name in self.DETAILS}
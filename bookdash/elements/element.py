@@ -1,16 +1,64 @@
 """A module for parsing data from HTML elements."""
 
+from functools import cached_property
+
 import lxml.html as parser
-from bs4 import BeautifulSoup
 from lxml import etree
 from lxml.etree import ParseError
 from more_itertools import first
 
-__all__ = ["Element"]
+__all__ = ["Element", "compile_xpath", "parse", "selectors"]
+
+_xpaths: dict[str, etree.XPath] = {}
+_selector_classes: list[type] = []
+
+
+def parse(text: str) -> parser.HtmlElement:
+    """Parse an HTML string and return its root element."""
+    return parser.fromstring(text)
+
+
+def compile_xpath(path: str) -> etree.XPath:
+    """Return the compiled XPath for path, compiling it the first time.
+
+    Text results are plain str instead of lxml "smart strings", which keep a
+    reference to their parent element.
+    """
+    xpath = _xpaths.get(path)
+    if xpath is None:
+        xpath = _xpaths[path] = etree.XPath(path, smart_strings=False)
+    return xpath
+
+
+def selectors() -> dict[str, dict[str, str]]:
+    """Return the SELECTORS of every element class mapped by class name."""
+    return {cls.__name__: dict(cls.SELECTORS) for cls in _selector_classes}
 
 
 class Element:
-    """Element class providing shorthand methods for lxml objects."""
+    """Element class providing shorthand methods for lxml objects.
+
+    Subclasses declare their xpaths by name in SELECTORS, which are compiled
+    when the class is defined. Any method that takes a path accepts either a
+    selector name or an xpath.
+    """
+
+    SELECTORS: dict[str, str] = {}
+    """Selector name -> xpath."""
+
+    def __init_subclass__(cls, **kwargs):
+        """Compile the xpaths in SELECTORS when a subclass is defined."""
+        super().__init_subclass__(**kwargs)
+        if "SELECTORS" not in cls.__dict__:
+            return
+        for path in cls.SELECTORS.values():
+            compile_xpath(path)
+        _selector_classes.append(cls)
+
+    @classmethod
+    def selector(cls, name: str) -> etree.XPath:
+        """Return the compiled XPath for the selector name."""
+        return compile_xpath(cls.SELECTORS[name])
 
     def __init__(self, element=None):
         """Set lxml element.
@@ -20,41 +68,62 @@ class Element:
         element (str, parser.HtmlElement): Element or string to generate one
         """
         if element is None:
-            self.raw = ""
+            self._raw = ""
             self.element = None
             return
 
         if isinstance(element, str):
-            self.raw = element
+            self._raw = element
             try:
-                element = parser.fromstring(element)
+                element = parse(element)
             except (BaseException, ParseError):
                 element = None
         else:
-            self.raw = etree.tostring(element)
+            # serialized on demand by .raw
+            self._raw = None
 
         self.element = element
 
     @property
-    def doc(self):
-        """Return a BeautifulSoup document."""
-        return BeautifulSoup(self.raw, "html.parser")
+    def raw(self):
+        """Return the markup, serializing the element the first time if it was
+        not created from a string."""
+        if self._raw is None:
+            self._raw = etree.tostring(self.element)
+        return self._raw
+
+    @raw.setter
+    def raw(self, value):
+        """Raw setter."""
+        self._raw = value
+
+    @cached_property
+    def doc(self) -> parser.HtmlElement:
+        """Return the root element of the document this element belongs to.
+
+        This is the same lxml tree as .element, so no parsing is done.
+        """
+        if self.element is None:
+            return
+        return self.element.getroottree().getroot()
 
-    def xpath(self, path) -> list:
+    def xpath(self, path, node=None) -> list:
         """Return the list of objects for path.
 
         Params
         ------
-        path (str): xpath
+        path (str): selector name or xpath
+        node (parser.HtmlElement, default: element): node to evaluate from
         """
-        return self.element.xpath(path)
+        compiled = compile_xpath(self.SELECTORS.get(path, path))
+        return compiled(self.element if node is None else node)
 
     def first(self, path) -> object:
         """Return the first object for path or None.
 
         Params
         ------
-        path (str): xpath
+        path (str): selector name or xpath
         """
         return first(self.xpath(path), None)
 
@@ -63,10 +132,10 @@ class Element:
 
         Params
         ------
-        path (str): xpath
+        path (str): selector name or xpath
         name (str): attribute name
         """
         elm = self.first(path)
         if elm is None:
             return
-        return elm.attrib.get("id")
+        return elm.attrib.get(name)
@@ -10,13 +10,26 @@ __all__ = ["FoundBookElement"]
 class FoundBookElement(BookElement):
     """A class for parsing a book TR from Goodreads search results."""
 
+    ROW_TYPE = "http://schema.org/Book"
+    """The itemtype attribute of result rows."""
+
+    SELECTORS = {
+        # rows and pages are evaluated against the search results page
+        "rows": f'//tr[@itemtype="{ROW_TYPE}"]',
+        "pages": '//a[starts-with(@href, "/search?page=")]/text()',
+        "id": ".//div[@class='u-anchorTarget']",
+        "author": './/a[@class="authorName"]/span/text()',
+        "title": './/a[@class="bookTitle"]/span/text()',
+        "url": './/a[@class="bookTitle"]/@href',
+    }
+
     def __init__(self, element=None):
         """Parse book attributes from element."""
         super().__init__(element)
         if self.element is None:
             return
 
-        self.id = self.attr(".//div[@class='u-anchorTarget']", "id")
-        self.author = self.first('.//a[@class="authorName"]/span/text()')
-        self.title = self.first('.//a[@class="bookTitle"]/span/text()')
-        self.url = self.first('.//a[@class="bookTitle"]/@href')
+        self.id = self.attr("id", "id")
+        self.author = self.first("author")
+        self.title = self.first("title")
+        self.url = self.first("url")
@@ -0,0 +1,153 @@
+"""Module for bulk importing a Goodreads library export into the database."""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+from more_itertools import chunked
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from bookdash import log
+from bookdash.csv_file import CsvFile
+from bookdash.db import DB
+from bookdash.library import Library
+from bookdash.models.goodreads_book import (GoodreadsBook, RowConverter,
+                                            content_hash)
+from bookdash.models.import_run import ImportRun
+
+bp = breakpoint
+
+__all__ = ["Importer"]
+
+
+class Importer:
+    """Sync rows from a Goodreads "My Books" CSV export in chunks.
+
+    Each row's content hash is compared to the hash stored with the existing
+    row, so only new or changed rows are written. Rows missing from the
+    export are only deleted when pruning, and never when the export has no
+    rows.
+    """
+
+    CHUNK_SIZE = 1000
+    """Number of rows written per transaction."""
+
+    def __init__(self, file: Path, db: DB = None, chunk_size: int = None,
+                 prune: bool = False):
+        """Goodreads CSV importer.
+
+        Params
+        ------
+        file (Path): path to the exported CSV file
+        db (DB, default: DB()): database to import into
+        chunk_size (int, default: CHUNK_SIZE): rows per transaction
+        prune (bool, default: False): delete rows that are not in the file
+        """
+        self.csv = CsvFile(file, lazy=True)
+        self.db = db or DB()
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.prune = prune
+        self.count = 0
+        self.elapsed = 0.0
+        self.run_info = None
+
+    def __repr__(self):
+        """Importer class repr."""
+        return (f"Importer <file={self.csv.filepath.name!r}, "
+                f"count={self.count}, rate={self.rate:.0f}/s>")
+
+    @property
+    def table(self):
+        """Return the GoodreadsBook table."""
+        return GoodreadsBook.__table__
+
+    @property
+    def columns(self) -> tuple[str]:
+        """Return the names of the GoodreadsBook columns."""
+        return tuple(self.table.columns.keys())
+
+    @property
+    def rate(self) -> float:
+        """Return the number of rows imported per second."""
+        if not self.elapsed:
+            return 0.0
+        return self.count / self.elapsed
+
+    @property
+    def statement(self):
+        """Return an insert statement that updates rows with an existing id."""
+        stmt = insert(self.table)
+        return stmt.on_conflict_do_update(
+            index_elements=[self.table.c.id],
+            set_={
+                name: stmt.excluded[name]
+                for name in self.columns if name != "id"
+            },
+        )
+
+    def stored_hashes(self) -> dict[int, str]:
+        """Return the content hash of every stored row mapped by id."""
+        query = select(self.table.c.id, self.table.c.content_hash)
+        with self.db.engine.connect() as conn:
+            return dict(conn.execute(query).all())
+
+    def run(self) -> ImportRun:
+        """Import new and changed rows and return a record of the changes."""
+        # also creates the full-text index, which triggers keep up to date
+        Library(self.db).create()
+        stmt = self.statement
+        run = self.run_info = ImportRun(file=str(self.csv.filepath))
+
+        start = perf_counter()
+        stored = self.stored_hashes()
+        seen = set()
+        chunks = self.csv.stream(self.chunk_size, raw=True)
+
+        # every record has the same keys so that each chunk can be sent to
+        # the database as a single executemany()
+        converter = RowConverter(self.csv.headings, columns=self.columns)
+
+        for chunk in chunks:
+            changes = []
+            for record in converter.convert_many(chunk):
+                record["content_hash"] = digest = content_hash(record)
+                book_id = record["id"]
+                seen.add(book_id)
+
+                if book_id not in stored:
+                    run.inserted += 1
+                elif stored[book_id] != digest:
+                    run.updated += 1
+                else:
+                    run.unchanged += 1
+                    continue
+                changes.append(record)
+
+            if changes:
+                with self.db.engine.begin() as conn:
+                    conn.execute(stmt, changes)
+            self.count += len(chunk)
+
+        # an empty export is more likely a bad file than an empty library
+        if self.prune and not seen:
+            log(prefix=f"{self.__class__.__name__}.run():",
+                skipped="not pruning, the file has no rows")
+        elif self.prune:
+            missing = stored.keys() - seen
+            for ids in chunked(missing, self.chunk_size):
+                with self.db.engine.begin() as conn:
+                    conn.execute(delete(self.table).where(self.table.c.id.in_(ids)))
+            run.deleted = len(missing)
+
+        self.elapsed = perf_counter() - start
+        run.rows = self.count
+        run.finished_at = datetime.now(timezone.utc)
+
+        with self.db.session_scope() as session:
+            session.add(run)
+
+        log(prefix=f"{self.__class__.__name__}.run():", count=self.count,
+            elapsed=round(self.elapsed, 3), rate=round(self.rate),
+            summary=run.summary())
+        return run
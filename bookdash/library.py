@@ -0,0 +1,174 @@
+"""Module for searching the local library database."""
+
+import re
+
+from sqlalchemy import text
+from sqlmodel import select
+
+from bookdash.db import DB
+from bookdash.models.goodreads_book import GoodreadsBook
+
+bp = breakpoint
+
+__all__ = ["Library"]
+
+
+class Library:
+    """Full-text search over the books in the local library database.
+
+    Uses an SQLite FTS5 table that indexes the GoodreadsBook table and is kept
+    in sync with it by triggers, so imports update the index automatically.
+    """
+
+    FTS_TABLE = "goodreadsbook_fts"
+
+    FTS_COLUMNS = {
+        "title": 10.0,
+        "author": 5.0,
+        "additional_authors": 2.0,
+        "bookshelves": 1.0,
+        "my_review": 1.0,
+        "private_notes": 1.0,
+    }
+    """Indexed columns mapped to their bm25() rank weight."""
+
+    FILTER_COLUMNS = {
+        "title": "title",
+        "author": "author",
+        # series names are part of the title, ie "Dead Things (Eric Carter, #1)"
+        "series": "title",
+    }
+    """Search filters mapped to the indexed column they search."""
+
+    LIMIT = 20
+
+    TOKENIZER = re.compile(r"\w+(?:['’]\w+)*")
+
+    APOSTROPHE = re.compile(r"['’]")
+
+    def __init__(self, db: DB = None):
+        """Library for db, defaults to DB()."""
+        self.db = db or DB()
+
+    @property
+    def table(self) -> str:
+        """Return the name of the GoodreadsBook table."""
+        return GoodreadsBook.__tablename__
+
+    def ddl(self) -> list[str]:
+        """Return the statements to create the index and its triggers."""
+        table, fts = self.table, self.FTS_TABLE
+        columns = ", ".join(self.FTS_COLUMNS)
+        new = ", ".join(f"new.{c}" for c in self.FTS_COLUMNS)
+        old = ", ".join(f"old.{c}" for c in self.FTS_COLUMNS)
+
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{table}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')",
+
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+            f"BEGIN INSERT INTO {fts}(rowid, {columns}) "
+            f"VALUES (new.id, {new}); END",
+
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+            f"BEGIN INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); END",
+
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} "
+            f"BEGIN INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {fts}(rowid, {columns}) "
+            f"VALUES (new.id, {new}); END",
+        ]
+
+    def create(self) -> None:
+        """Create the full-text index, indexing existing rows if it is new."""
+        self.db.create()
+        with self.db.engine.begin() as conn:
+            exists = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (self.FTS_TABLE,)
+            ).first()
+
+            for statement in self.ddl():
+                conn.exec_driver_sql(statement)
+
+            if not exists:
+                self.rebuild(conn)
+
+    def rebuild(self, conn=None) -> None:
+        """Re-index every row of the GoodreadsBook table."""
+        statement = f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}) VALUES ('rebuild')"
+        if conn:
+            conn.exec_driver_sql(statement)
+            return
+
+        with self.db.engine.begin() as conn:
+            conn.exec_driver_sql(statement)
+
+    def terms(self, value: str) -> str:
+        """Return a query string that matches every word in value as a prefix.
+
+        The index splits words at apostrophes, so they are split here too, but
+        one letter endings like the "s" of a possessive are dropped because
+        they would match any word starting with that letter.
+
+        Example:
+            >>> Library().terms("Ender's Game")
+            '"ender"* "game"*'
+            >>> Library().terms("O'Brien")
+            '"o"* "brien"*'
+        """
+        words = []
+        for word in self.TOKENIZER.findall(str(value).lower()):
+            stem, *endings = self.APOSTROPHE.split(word)
+            words += [stem, *(ending for ending in endings if len(ending) > 1)]
+        return " ".join(f'"{word}"*' for word in words)
+
+    def expression(self, query: str = None, **filters) -> str:
+        """Return an FTS5 MATCH expression for query and column filters.
+
+        Example:
+            >>> Library().expression("ender", author="card")
+            '("ender"*) AND author : ("card"*)'
+        """
+        parts = []
+        if query and (terms := self.terms(query)):
+            parts.append(f"({terms})")
+
+        for name, value in filters.items():
+            if not value or not (terms := self.terms(value)):
+                continue
+            column = self.FILTER_COLUMNS[name]
+            parts.append(f"{column} : ({terms})")
+
+        return " AND ".join(parts)
+
+    def search(self, query: str = None, limit: int = None, **filters) -> list[GoodreadsBook]:
+        """Return the best ranked books matching query and filters.
+
+        Params
+        ------
+        query (str): words to match in any indexed column
+        limit (int, default: LIMIT): maximum number of books to return
+        title (str): words to match in the title
+        author (str): words to match in the author
+        series (str): words to match in the series
+        """
+        expression = self.expression(query, **filters)
+        if not expression:
+            return []
+
+        table, fts = self.table, self.FTS_TABLE
+        weights = ", ".join(map(str, self.FTS_COLUMNS.values()))
+        statement = text(
+            f"SELECT {table}.* FROM {fts} "
+            f"JOIN {table} ON {table}.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :expression "
+            f"ORDER BY bm25({fts}, {weights}) "
+            "LIMIT :limit"
+        ).bindparams(expression=expression, limit=limit or self.LIMIT)
+
+        with self.db.session_scope() as session:
+            query = select(GoodreadsBook).from_statement(statement)
+            return list(session.exec(query).scalars())
@@ -0,0 +1,60 @@
+"""Book details parsed from Goodreads book pages."""
+
+from datetime import datetime, timedelta, timezone
+from typing import ClassVar, Optional
+
+from sqlmodel import Field, SQLModel
+
+bp = breakpoint
+
+
+class BookDetails(SQLModel, table=True):
+    """Database table model for the details parsed from a book page."""
+
+    __tablename__ = "book_details"
+
+    id: int = Field(primary_key=True)
+    title: Optional[str] = None
+    author: Optional[str] = None
+    series: Optional[str] = None
+    number: Optional[str] = None
+    rating: Optional[float] = None
+    ratings_count: Optional[int] = None
+    pages: Optional[int] = None
+    format: Optional[str] = None
+    publication: Optional[str] = None
+    genres: Optional[str] = None
+    fetched_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+
+    GENRE_SEPARATOR: ClassVar[str] = ", "
+
+    @classmethod
+    def from_details(cls, details: dict) -> "BookDetails":
+        """Return a BookDetails from BookPageElement.details()."""
+        details = details.copy()
+        details["genres"] = cls.GENRE_SEPARATOR.join(details.get("genres") or [])
+        if details.get("number") is not None:
+            details["number"] = str(details["number"])
+        return cls(**details)
+
+    @property
+    def genre_list(self) -> list[str]:
+        """Return the genres as a list."""
+        if not self.genres:
+            return []
+        return self.genres.split(self.GENRE_SEPARATOR)
+
+    @property
+    def age(self) -> timedelta:
+        """Return the time since the details were fetched."""
+        fetched_at = self.fetched_at
+        # sqlite doesn't store the timezone
+        if fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - fetched_at
+
+    def fresh(self, max_age: timedelta) -> bool:
+        """Return True if the details were fetched less than max_age ago."""
+        return self.age < max_age
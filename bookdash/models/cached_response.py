@@ -0,0 +1,31 @@
+"""HTTP responses stored by the response cache."""
+
+from typing import Optional
+
+from sqlalchemy import MetaData
+from sqlmodel import Field, SQLModel
+
+bp = breakpoint
+
+
+class CacheModel(SQLModel):
+    """Base for tables stored in the cache database instead of the library."""
+
+    metadata = MetaData()
+
+
+class CachedResponse(CacheModel, table=True):
+    """Database table model for a cached HTTP response."""
+
+    key: str = Field(primary_key=True)
+    method: str
+    url: str
+    status_code: int
+    reason: Optional[str] = None
+    headers: str = "{}"
+    content: bytes = b""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: int = 0
+    stored_at: float = Field(default=0.0)
+    accessed_at: float = Field(default=0.0, index=True)
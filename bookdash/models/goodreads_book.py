@@ -1,8 +1,10 @@
 """Goodreads Books from "My Books" CSV export."""
 
+from collections.abc import Mapping
+from hashlib import blake2b
 from datetime import date, datetime
-from typing import Annotated, Optional, Callable, TypeVar
-from functools import reduce
+from typing import Annotated, Iterable, Optional, Callable, Sequence, TypeVar
+from functools import lru_cache, reduce
 
 from pydantic import field_validator
 from sqlmodel import Field, Session, SQLModel, create_engine, select
@@ -80,23 +82,112 @@ def field_callbacks(heading: str) -> tuple[Callable]:
     return field_functs + global_functs
 
 
+def compose(functs: Sequence[Callable]) -> Callable:
+    """Return a function that calls each of functs on the previously returned
+    value, in order."""
+    if len(functs) == 1:
+        return functs[0]
+
+    # the common case of one field transformer followed by none_if_blank
+    if len(functs) == 2:
+        first, second = functs
+        return lambda value: second(first(value))
+
+    def composed(value):
+        # calls each successive transform function on the previously
+        # returned value
+        return reduce(lambda v, func: func(v), functs, value)
+    return composed
+
+
+class RowConverter:
+    """Convert CSV rows to GoodreadsBook attributes.
+
+    The conversion plan -- column index, attribute name and composed
+    transformer for each heading -- is compiled once from the CSV headings
+    and reused for every row of the file.
+    """
+
+    def __init__(self, headings: Sequence[str], columns: Sequence[str] = None):
+        """Compile the conversion plan for headings.
+
+        Params
+        ------
+        headings (Sequence[str]): CSV heading names, in column order
+        columns (Sequence[str], optional): only convert these attributes, and
+                                           include all of them in every record
+        """
+        self.headings = tuple(headings)
+        self.columns = tuple(columns) if columns else None
+
+        plan = []
+        for index, heading in enumerate(self.headings):
+            attr = head_to_attr(heading)
+            if self.columns and attr not in self.columns:
+                continue
+            plan.append((index, heading, attr, compose(field_callbacks(heading))))
+        self.plan = tuple(plan)
+        self.width = len(self.headings)
+
+    def __repr__(self):
+        """RowConverter class repr."""
+        return f"RowConverter <fields={len(self.plan)}>"
+
+    def convert(self, row) -> dict:
+        """Return a dictionary of attributes from a CSV row.
+
+        Params
+        ------
+        row (dict, Sequence): a DictReader row or a list of values
+        """
+        record = dict.fromkeys(self.columns) if self.columns else {}
+
+        if isinstance(row, Mapping):
+            for _, heading, attr, funct in self.plan:
+                record[attr] = funct(row.get(heading) or "")
+            return record
+
+        # short rows are padded with blank values the same as DictReader
+        if len(row) < self.width:
+            row = list(row) + [""] * (self.width - len(row))
+
+        for index, _, attr, funct in self.plan:
+            record[attr] = funct(row[index])
+        return record
+
+    def convert_many(self, rows: Iterable) -> list[dict]:
+        """Return a list of attribute dictionaries from a chunk of CSV rows."""
+        convert = self.convert
+        return [convert(row) for row in rows]
+
+
+@lru_cache(maxsize=32)
+def converter_for(headings: tuple[str]) -> RowConverter:
+    """Return the (cached) RowConverter for a tuple of CSV headings."""
+    return RowConverter(headings)
+
+
+def csv_to_attrs(csv_data: dict) -> dict:
+    """Return a dictionary of GoodreadsBook attributes from a CSV row."""
+    return converter_for(tuple(csv_data)).convert(csv_data)
+
+
+def content_hash(record: dict) -> str:
+    """Return a digest of the GoodreadsBook attributes in record.
+
+    The content_hash attribute itself is ignored, so the digest of a stored row
+    can be compared to the digest of a freshly converted CSV row.
+    """
+    values = tuple(
+        (name, value) for name, value in sorted(record.items())
+        if name != "content_hash"
+    )
+    return blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
 def from_csv(csv_data) -> SQLModel:
     """Create GoodreadsBook instance from CSV row."""
-    attrs = {
-        # key: new heading name
-        # value: the value returned from all transform callbacks
-        head_to_attr(heading): reduce(
-            # calls each successive transform function on the previously
-            # returned value
-            lambda v, func: func(v),
-            # list of callbacks for this field
-            field_callbacks(heading),
-            # the inital value
-            value
-        )
-        for heading, value in csv_data.items()
-    }
-    inst = GoodreadsBook(**attrs)
+    inst = GoodreadsBook(**csv_to_attrs(csv_data))
     return inst
 
 
@@ -128,3 +219,6 @@ class GoodreadsBook(SQLModel, table=True):
     private_notes: Optional[str]
     read_count: Optional[int]
     owned_copies: Optional[int]
+    # only read with the id of every row, in Importer.stored_hashes(), so it
+    # doesn't need an index
+    content_hash: Optional[str] = Field(default=None)
@@ -0,0 +1,44 @@
+"""Record of each Goodreads library import."""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+bp = breakpoint
+
+
+class ImportRun(SQLModel, table=True):
+    """Database table model for one run of the importer."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    file: str
+    started_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+    finished_at: Optional[datetime] = None
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> int:
+        """Return the number of rows that were written or removed."""
+        return self.inserted + self.updated + self.deleted
+
+    @property
+    def elapsed(self) -> float:
+        """Return the number of seconds the run took."""
+        if not self.finished_at:
+            return 0.0
+        return (self.finished_at - self.started_at).total_seconds()
+
+    def summary(self) -> str:
+        """Return a one line summary of the changes."""
+        return (
+            f"{self.rows} rows: {self.inserted} inserted, "
+            f"{self.updated} updated, {self.deleted} deleted, "
+            f"{self.unchanged} unchanged"
+        )
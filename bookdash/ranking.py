@@ -0,0 +1,119 @@
+"""Module for selecting the best matching books from search results."""
+
+import heapq
+from itertools import count
+from typing import Iterable
+
+bp = breakpoint
+
+__all__ = ["Ranker"]
+
+
+class Ranker:
+    """Keep the limit best scoring books added, in a heap.
+
+    Only books that score at or above an adaptive threshold are returned.
+    The threshold starts at THRESHOLD and is lowered by STEP until at least
+    `enough` books meet it. If none do above FLOOR, the best books are
+    returned regardless of score.
+    """
+
+    LIMIT = 10
+    """Maximum number of books to return."""
+
+    THRESHOLD = 0.9
+    """Score that books are first required to meet."""
+
+    STEP = 0.15
+    """Amount the threshold is lowered by each time it is relaxed."""
+
+    FLOOR = 0.3
+    """Lowest the threshold can be relaxed to."""
+
+    ENOUGH = 1
+    """Number of books that need to meet the threshold."""
+
+    def __init__(self, limit: int = None, threshold: float = None,
+                 enough: int = None):
+        """Ranker.
+
+        Params
+        ------
+        limit (int, default: LIMIT): maximum number of books to return
+        threshold (float, default: THRESHOLD): score first required
+        enough (int, default: ENOUGH): books needed to meet the threshold
+
+        Raises
+        ------
+        ValueError: if limit is less than 1
+        """
+        self.limit = self.LIMIT if limit is None else limit
+        if self.limit < 1:
+            raise ValueError(f"Ranker limit must be at least 1, not {limit}.")
+        self.start = self.THRESHOLD if threshold is None else threshold
+        self.enough = min(enough or self.ENOUGH, self.limit)
+        self.heap = []
+        self.added = 0
+        self._order = count()
+
+    def __repr__(self):
+        """Ranker class repr."""
+        return (f"Ranker <limit={self.limit}, added={self.added}, "
+                f"threshold={self.threshold}>")
+
+    def __len__(self):
+        """Return the number of books kept."""
+        return len(self.heap)
+
+    def add(self, book) -> None:
+        """Add book, dropping the lowest scoring book if over the limit.
+
+        Books with the same score keep the order they were added in.
+        """
+        entry = (book.score or 0, -next(self._order), book)
+        self.added += 1
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def extend(self, books: Iterable) -> None:
+        """Add each of books."""
+        for book in books:
+            self.add(book)
+
+    def levels(self) -> list[float]:
+        """Return each threshold from the starting one down to FLOOR."""
+        levels, level = [], self.start
+        while level >= self.FLOOR - 1e-9:
+            levels.append(round(level, 6))
+            level -= self.STEP
+        return levels
+
+    @property
+    def threshold(self) -> float:
+        """Return the highest threshold that enough books meet, or 0.0 if
+        there is none."""
+        scores = heapq.nlargest(self.enough, (entry[0] for entry in self.heap))
+        if len(scores) < self.enough:
+            return 0.0
+
+        lowest = scores[-1]
+        for level in self.levels():
+            if lowest >= level:
+                return level
+        return 0.0
+
+    @property
+    def satisfied(self) -> bool:
+        """Return True if enough books meet the starting threshold, meaning
+        that fetching more results is not likely to find better matches."""
+        return self.threshold >= self.start
+
+    def results(self) -> list:
+        """Return the books that meet the threshold, best match first."""
+        threshold = self.threshold
+        return [
+            book for score, _, book in sorted(self.heap, reverse=True)
+            if score >= threshold
+        ]
@@ -0,0 +1,221 @@
+"""Module for fuzzy scoring how well book fields match search filters.
+
+Similarity is based on the length of the longest common subsequence (LCS) of
+two strings, computed with a bit-parallel algorithm that handles one
+character of the candidate per step instead of comparing every pair of
+characters.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, Union
+
+bp = breakpoint
+
+__all__ = [
+    "METRICS",
+    "Scorer",
+    "normalize",
+    "partial_ratio",
+    "ratio",
+    "token_set_ratio",
+    "weighted_ratio",
+]
+
+MATCH_FILTERER = re.compile(r"(?!\w|\s).")
+
+WORD_START = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize(text) -> str:
+    """Return text lowercased and stripped of punctuation for comparison.
+
+    Example:
+        >>> normalize(" Ender's Game ")
+        'enders game'
+    """
+    return MATCH_FILTERER.sub("", str(text).lower().strip())
+
+
+class Pattern:
+    """A string prepared for LCS comparisons against many other strings."""
+
+    def __init__(self, text: str):
+        """Build the bitmask of the positions of each character in text."""
+        self.text = text
+        self.size = len(text)
+        self.mask = (1 << self.size) - 1
+        self.positions = {}
+        for i, char in enumerate(text):
+            self.positions[char] = self.positions.get(char, 0) | (1 << i)
+
+    def __repr__(self):
+        """Pattern class repr."""
+        return f"Pattern({self.text!r})"
+
+    def lcs(self, other: str) -> int:
+        """Return the length of the longest common subsequence with other.
+
+        Example:
+            >>> Pattern("enders game").lcs("ender game")
+            10
+        """
+        positions, mask = self.positions, self.mask
+        bits = mask
+        for char in other:
+            matches = bits & positions.get(char, 0)
+            bits = ((bits + matches) | (bits - matches)) & mask
+        # each zero bit left is a character of the subsequence
+        return self.size - bin(bits).count("1")
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(text: str) -> Pattern:
+    """Return the Pattern for text, building it the first time."""
+    return Pattern(text)
+
+
+def ratio(a: str, b: str) -> float:
+    """Return the similarity of a and b, from 0 to 1.
+
+    Example:
+        >>> ratio("enders game", "ender game")
+        0.9523809523809523
+    """
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    return 2 * compile_pattern(a).lcs(b) / total
+
+
+def partial_ratio(a: str, b: str, cutoff: float = 0.0) -> float:
+    """Return the best ratio of the shorter string to any part of the longer
+    string of the same length that starts at a word or ends the string.
+
+    Params
+    ------
+    a (str): normalized string
+    b (str): normalized string
+    cutoff (float, default: 0.0): return 0.0 without searching every part of
+           the longer string if the score can't be higher than this
+
+    Example:
+        >>> partial_ratio("enders game", "the enders game boxed set")
+        1.0
+    """
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if not short:
+        return float(not long)
+
+    pattern = compile_pattern(short)
+    size, last = pattern.size, len(long) - pattern.size
+
+    # no part of long can have more in common with short than all of it
+    bound = pattern.lcs(long)
+    if bound / size <= cutoff:
+        return 0.0
+
+    starts = [0, *(m.end() for m in WORD_START.finditer(long, 0, last))]
+    best = 0
+    for start in [*starts, last]:
+        best = max(best, pattern.lcs(long[start:start + size]))
+        if best == bound:
+            break
+    return best / size
+
+
+def token_set_ratio(a: str, b: str) -> float:
+    """Return the best ratio of the words a and b share, alone and followed by
+    the words only in either one, ignoring word order and repeats.
+
+    Example:
+        >>> token_set_ratio("game enders", "enders game")
+        1.0
+    """
+    words_a, words_b = set(a.split()), set(b.split())
+    common = " ".join(sorted(words_a & words_b))
+    only_a = " ".join(filter(None, [common, *sorted(words_a - words_b)]))
+    only_b = " ".join(filter(None, [common, *sorted(words_b - words_a)]))
+
+    scores = [ratio(only_a, only_b)]
+    if common:
+        scores += [ratio(common, only_a), ratio(common, only_b)]
+    return max(scores)
+
+
+def weighted_ratio(a: str, b: str) -> float:
+    """Return the best of ratio(), token_set_ratio() and, when one string is
+    much longer than the other, partial_ratio(), with the looser metrics
+    weighted lower.
+
+    Example:
+        >>> weighted_ratio("enders game", "enders game")
+        1.0
+    """
+    score = ratio(a, b)
+    if score == 1.0:
+        return score
+
+    score = max(score, token_set_ratio(a, b) * 0.95)
+
+    short, long = sorted((len(a), len(b)))
+    if short and long / short >= 1.5:
+        score = max(score, partial_ratio(a, b, score / 0.9) * 0.9)
+    return score
+
+
+METRICS = {
+    "ratio": ratio,
+    "partial": partial_ratio,
+    "token_set": token_set_ratio,
+    "weighted": weighted_ratio,
+}
+"""Similarity functions by name."""
+
+
+class Scorer:
+    """Score how well candidate strings match a query string.
+
+    Both are normalized before they are compared, and normalized strings are
+    cached so that a query only has to be normalized once per search.
+    """
+
+    DEFAULT_METRIC = "weighted"
+
+    def __init__(self, metric: Union[str, Callable] = None):
+        """Scorer.
+
+        Params
+        ------
+        metric (str, Callable, default: DEFAULT_METRIC): name of a function
+               in METRICS, or a function that takes two normalized strings
+               and returns a float from 0 to 1
+        """
+        metric = metric or self.DEFAULT_METRIC
+        if isinstance(metric, str):
+            metric = METRICS[metric]
+        self.metric = metric
+
+    def __repr__(self):
+        """Scorer class repr."""
+        return f"Scorer <metric={self.metric.__name__}>"
+
+    def score(self, query, candidate) -> float:
+        """Return the match score of candidate for query.
+
+        Example:
+            >>> Scorer().score("Ender's Game", "ENDERS GAME")
+            1.0
+        """
+        return self.metric(normalize(query), normalize(candidate))
+
+    def score_many(self, query, candidates: Iterable) -> list[float]:
+        """Return the match score of each candidate for query.
+
+        Example:
+            >>> Scorer("ratio").score_many("abc", ["abc", "xyz"])
+            [1.0, 0.0]
+        """
+        query, metric = normalize(query), self.metric
+        return [metric(query, normalize(candidate)) for candidate in candidates]
@@ -0,0 +1,65 @@
+"""Module for timing the phases of a slow process."""
+
+from contextlib import contextmanager
+from time import perf_counter
+
+bp = breakpoint
+
+__all__ = ["PhaseTimer"]
+
+
+class PhaseTimer:
+    """Record how long each named phase of a process takes.
+
+    Example:
+        >>> timer = PhaseTimer()
+        >>> with timer.phase("load"):
+        ...     pass
+        >>> list(timer.phases)
+        ['load']
+    """
+
+    def __init__(self):
+        """Phase timer."""
+        self.phases: dict[str, float] = {}
+
+    def __repr__(self):
+        """PhaseTimer class repr."""
+        return f"PhaseTimer <phases={len(self.phases)}, total={self.total:.3f}s>"
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the block as phase name, adding to any earlier time for name.
+
+        The time is recorded even if the block raises an exception.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    @property
+    def total(self) -> float:
+        """Return the total seconds of all phases."""
+        return sum(self.phases.values())
+
+    def report(self) -> str:
+        """Return a table of the seconds and share of the total of each phase.
+
+        Example:
+            >>> timer = PhaseTimer()
+            >>> timer.phases = {"start": 3.0, "type": 1.0}
+            >>> print(timer.report())
+            start   3.000s   75%
+            type    1.000s   25%
+            total   4.000s
+        """
+        width = max(map(len, [*self.phases, "total"]))
+        total = self.total or 1
+        lines = [
+            f"{name:<{width}}  {seconds:>6.3f}s  {seconds / total:>4.0%}"
+            for name, seconds in self.phases.items()
+        ]
+        lines.append(f"{'total':<{width}}  {self.total:>6.3f}s")
+        return "\n".join(lines)
@@ -4,7 +4,8 @@ import pytest
 import requests
 import requests_mock
 
-from bookdash.clients.base_client import BaseClient
+from bookdash.clients.base_client import (BaseClient, RateLimitedError,
+                                          RequestError)
 
 bp = breakpoint
 
@@ -59,12 +60,134 @@ def test_partial(filecontents):  # noqa
     assert response.text == filecontents
 
 
-@pytest.mark.skip("""need to refactor to raise exception instead of exiting""")
-@pytest.mark.parametrize("filecontents", [
-    {'filename': "todo.json"}
-], indirect=True)
-def test_failed_request(filecontents):
-    ...
+@pytest.fixture
+def sleep(mocker):
+    """Patch sleep() so that retries don't wait."""
+    return mocker.patch("bookdash.clients.base_client.sleep")
+
+
+def test_failed_request(sleep):
+    """
+    GIVEN: a url that responds with a client error
+    WHEN: .request() is called
+    THEN: a RequestError should be raised without retrying
+    """
+    api = BaseClient()
+    url = "https://jsonplaceholder.typicode.com/todos/1"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, status_code=404, reason="Not Found")
+        with pytest.raises(RequestError) as excinfo:
+            api.request("GET", url)
+
+    assert m.call_count == 1
+    assert excinfo.value.status_code == 404
+    assert api.responses[-1] is excinfo.value.response
+
+
+def test_request_retry(sleep):
+    """
+    GIVEN: a url that fails with a retryable status before succeeding
+    WHEN: .request() is called
+    THEN: it should be retried after a backoff delay
+    """
+    api = BaseClient()
+    url = "https://jsonplaceholder.typicode.com/todos/1"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, [
+            {"status_code": 503},
+            {"status_code": 429, "headers": {"Retry-After": "7"}},
+            {"status_code": 200, "text": "ok"},
+        ])
+        response = api.request("GET", url)
+
+    assert response.text == "ok"
+    assert m.call_count == 3
+    assert sleep.call_args_list[1].args == (7.0,)
+
+
+def test_request_retry_connection_error(sleep):
+    api = BaseClient()
+    url = "https://jsonplaceholder.typicode.com/todos/1"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, [{"exc": requests.ConnectionError}, {"text": "ok"}])
+        assert api.request("GET", url).text == "ok"
+
+
+def test_request_retry_post(sleep):
+    """
+    GIVEN: a url that fails with a retryable status
+    WHEN: .request() is called with POST
+    THEN: it should only be retried if the response has a Retry-After header
+    AND: connection errors should not be retried
+    """
+    api = BaseClient()
+    url = "https://jsonplaceholder.typicode.com/todos"
+
+    with requests_mock.Mocker() as m:
+        m.post(url, [
+            {"status_code": 503, "headers": {"Retry-After": "1"}},
+            {"status_code": 502},
+            {"status_code": 200, "text": "ok"},
+        ])
+        with pytest.raises(RequestError) as excinfo:
+            api.request("POST", url)
+
+        assert m.call_count == 2
+        assert excinfo.value.status_code == 502
+
+        m.post(url, exc=requests.ConnectionError)
+        with pytest.raises(RequestError):
+            api.request("POST", url)
+
+        assert m.call_count == 3
+
+
+def test_request_retries_exhausted(sleep):
+    """
+    GIVEN: a url that keeps responding with 429 Too Many Requests
+    WHEN: .request() is called
+    THEN: a RateLimitedError should be raised after MAX_RETRIES retries
+    """
+    api = BaseClient()
+    url = "https://jsonplaceholder.typicode.com/todos/1"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, status_code=429)
+        with pytest.raises(RateLimitedError):
+            api.request("GET", url)
+
+    assert m.call_count == api.MAX_RETRIES + 1
+    assert sleep.call_count == api.MAX_RETRIES
+
+
+@pytest.mark.parametrize(("headers", "expected"), [
+    ({}, None),
+    ({"Retry-After": "120"}, 120.0),
+    ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0.0),
+    ({"Retry-After": "soon"}, None),
+])
+def test_retry_after(headers, expected):
+    response = requests.Response()
+    response.headers.update(headers)
+    assert BaseClient().retry_after(response) == expected
+
+
+def test_backoff(mocker):
+    """
+    GIVEN: a response without a Retry-After header
+    WHEN: .backoff() is called
+    THEN: the delay should be capped exponential backoff with jitter
+    """
+    mocker.patch("bookdash.clients.base_client.uniform",
+                 side_effect=lambda a, b: b)
+    api = BaseClient()
+
+    assert api.backoff(0) == api.BACKOFF_BASE
+    assert api.backoff(2) == api.BACKOFF_BASE * 4
+    assert api.backoff(20) == api.BACKOFF_MAX
 
 
 @pytest.mark.skip("need to refactor to raise exception instead of exiting")
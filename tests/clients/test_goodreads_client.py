@@ -1,14 +1,23 @@
 import urllib.parse as url_parse
+from concurrent.futures import wait
+from datetime import datetime, timedelta
 from functools import partialmethod
 import pickle
+from threading import Event
 
+import lxml.html
 import pytest
 import requests
 import requests_mock
 from pytest_localserver.http import WSGIServer
+from selenium.common.exceptions import TimeoutException
 
 from bookdash.clients.goodreads_client import GoodreadsClient
-from tests import get_filecontents
+from bookdash.cookie_jar import CookieJar
+from bookdash.db import DB, dispose_engines
+from bookdash.elements.found_book_element import FoundBookElement
+from bookdash.models.book_details import BookDetails
+from tests import Stub, get_filecontents
 
 bp = breakpoint
 
@@ -51,10 +60,16 @@ class MockGoodreads:
         contents = get_filecontents(file).encode("utf8")
         return self.response("200 OK", "text/html", contents, headers)
 
+    SESSION_MAX_AGE = 30 * 24 * 60 * 60
+    """Seconds until the session-token cookie expires."""
+
     def authorize(self):
-        """Set session-id cookie then respond with success."""
+        """Set the session-token cookie that means logged in, then respond
+        with success."""
         file = "goodreads-home-authed.html"
-        headers = {"Set-Cookie": "session-id=12345"}
+        headers = {
+            "Set-Cookie": f"session-token=12345; Max-Age={self.SESSION_MAX_AGE}; Path=/"
+        }
         return self.success_response(file, headers)
 
     user_signin = partialmethod(success_response, "goodreads-user-signin.html")
@@ -99,7 +114,7 @@ def test_login(testserver, tmp_path):
 
     # ensure we have been redirected back to the home page
     assert current_url == f"{testserver.url}/"
-    assert api.cookie_jar.has("session-id")
+    assert api.cookie_jar.has("session-token")
     assert api.COOKIES_FILE.is_file()
 
 
@@ -165,3 +180,552 @@ def test_search_multi(filecontents):  # noqa
     params = {'q': "ender's game orson scott card", 'search[field]': "all"}
     assert response.request.path_url == f"/search?{encode(params)}"
     assert books
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_search_rows_not_serialized(filecontents, mocker):
+    """
+    GIVEN: a search results page
+    WHEN: .search() is called
+    THEN: each row should be wrapped in one FoundBookElement
+    AND: no row should be serialized back to markup
+    AND: the books should not keep the row elements
+    """
+    from bookdash.elements import element
+    from bookdash.elements.found_book_element import FoundBookElement
+
+    tostring = mocker.spy(element.etree, "tostring")
+    init = mocker.spy(FoundBookElement, "__init__")
+    api = GoodreadsClient(title="ender's game")
+
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search", text=filecontents)
+        books = api.search()
+
+    assert init.call_count == api.ranker.added == 20
+    assert tostring.call_count == 0
+    assert books[0].id
+    assert not hasattr(books[0], "element")
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_iter_search(filecontents):
+    """
+    GIVEN: a search results page
+    WHEN: .iter_search() is called
+    THEN: the first book should be yielded before the whole body is read
+    AND: every result should be yielded with the same score as .search()
+    """
+    body = filecontents.encode()
+    assert len(body) > GoodreadsClient.STREAM_CHUNK_SIZE
+
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search", content=body)
+        expected = GoodreadsClient(title="ender's game", cache=False).search()
+
+        api = GoodreadsClient(title="ender's game")
+        books = api.iter_search()
+        first_book = next(books)
+        assert api.responses[-1].raw.tell() < len(body)
+        books = [first_book, *books]
+
+    scores = {b.id: b.score for b in books}
+    assert len(books) == 20
+    assert all(scores[b.id] == b.score for b in expected)
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_search_ranked(filecontents):
+    """
+    GIVEN: a search results page
+    WHEN: .search() is called with a limit
+    THEN: at most limit books should be returned, best match first
+    AND: only books that meet the ranker's threshold should be returned
+    """
+    api = GoodreadsClient(title="ender's game")
+
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search", text=filecontents)
+        books = api.search(limit=3)
+
+    scores = [book.score for book in books]
+    assert 0 < len(books) <= 3
+    assert scores == sorted(scores, reverse=True)
+    assert min(scores) >= api.ranker.threshold > 0
+    assert books[0].title == "Ender's Game"
+
+
+def search_page(html: str, books: dict) -> str:
+    """Return a search results page made from html with the rows of books,
+    a dict of id to (title, author)."""
+    start = html.index('<tr itemscope itemtype="http://schema.org/Book">')
+    end = html.index("</tr>", start) + len("</tr>")
+    row = FoundBookElement(html[start:end])
+
+    rows = []
+    for book_id, (title, author) in books.items():
+        row.first("id").attrib["id"] = book_id
+        row.first('.//a[@class="bookTitle"]/span').text = title
+        row.first('.//a[@class="authorName"]/span').text = author
+        rows.append(lxml.html.tostring(row.element, encoding="unicode"))
+
+    return html[:start] + "".join(rows) + html[html.index("</table>", end):]
+
+
+@pytest.fixture
+def search_pages(filecontents):
+    """Mock three pages of search results where the best match is on the
+    third page."""
+    pages = {
+        2: search_page(filecontents, {"2": ("Pathfinder", "Orson Scott Card")}),
+        3: search_page(filecontents, {
+            "3": ("Ender in Exile", "Orson Scott Card"),
+            "19089701": ("Ender's Game by Orson Scott Card", "Brainy Book Reviews"),
+        }),
+    }
+
+    def page(request, context):
+        number = int(request.qs.get("page", ["1"])[0])
+        return pages.get(number, filecontents)
+
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search", text=page)
+        yield m
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_search_pages(search_pages):
+    """
+    GIVEN: a search without a good match on the first page
+    WHEN: .search() is called with pages
+    THEN: the other pages up to the last one should be fetched and ranked
+    AND: books on more than one page should only be ranked once
+    """
+    api = GoodreadsClient(title="ender in exile")
+    # one at a time, so that page 2 is always ranked before page 3
+    books = api.search(pages=5, workers=1)
+
+    requested = sorted(r.qs.get("page", ["1"])[0] for r in search_pages.request_history)
+    assert requested == ["1", "2", "3"]
+    assert api.ranker.added == 22
+    assert books[0].id == "3"
+    assert api.ranker.satisfied
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_search_pages_satisfied(search_pages):
+    """
+    GIVEN: a search with a good match on the first page
+    WHEN: .search() is called with pages
+    THEN: no other pages should be fetched
+    """
+    api = GoodreadsClient(title="ender's game")
+    books = api.search(pages=3)
+
+    assert search_pages.call_count == 1
+    assert books[0].title == "Ender's Game"
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_search_pages_stop_early(search_pages, mocker):
+    """
+    GIVEN: a search with a good match on the second page
+    WHEN: .search() is called with pages
+    THEN: no more pages should be requested
+    """
+    search_page = mocker.spy(GoodreadsClient, "search_page")
+    api = GoodreadsClient(title="pathfinder")
+    books = api.search(pages=3, workers=1)
+
+    assert [c.args[1] for c in search_page.call_args_list] == [1, 2]
+    assert books[0].id == "2"
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "goodreads-search.html"}
+], indirect=True)
+def test_search_pages_no_wait(search_pages, monkeypatch):
+    """
+    GIVEN: a search with a good match on the second page
+    WHEN: .search() is called with pages while the third is slow to respond
+    THEN: the results should be returned without waiting for the third page
+    """
+    release, finished = Event(), Event()
+    search_page = GoodreadsClient.search_page
+
+    def slow_page(self, page=1):
+        if page == 3:
+            release.wait(5)
+            finished.set()
+            return [], 3
+        return search_page(self, page)
+
+    monkeypatch.setattr(GoodreadsClient, "search_page", slow_page)
+    api = GoodreadsClient(title="pathfinder")
+    books = api.search(pages=3, workers=2)
+
+    assert not finished.is_set()
+    release.set()
+    assert books[0].id == "2"
+
+
+@pytest.fixture
+def details_db(tmp_path):
+    """Return a temporary database for book details."""
+    yield DB(tmp_path / "library.db")
+    dispose_engines()
+
+
+def test_show(details_db):
+    """
+    GIVEN: a book that has not been viewed before
+    WHEN: GoodreadsClient.show() is called
+    THEN: the details should be parsed from the book page
+    AND: they should be stored in the book_details table
+    """
+    url = "https://www.goodreads.com/book/show/15784263"
+    with requests_mock.Mocker() as m:
+        m.get(url, text=get_filecontents("goodreads-book-15784263.html"))
+        api = GoodreadsClient(cache=False)
+        details = api.show(15784263, details_db)
+
+    assert m.call_count == 1
+    assert details.title == "Dead Things"
+    assert details.rating == 3.79
+    assert details.pages == 295
+
+    stored = details_db.select_one(BookDetails, BookDetails.id == 15784263)
+    assert stored.ratings_count == 5013
+    assert stored.genre_list == details.genre_list
+
+
+def test_show_stored(details_db):
+    """
+    GIVEN: a book whose details were fetched recently
+    WHEN: GoodreadsClient.show() is called
+    THEN: the details should be read from the database without a request
+    AND: stale details should be requested again
+    """
+    url = "https://www.goodreads.com/book/show/15784263"
+    with requests_mock.Mocker() as m:
+        m.get(url, text=get_filecontents("goodreads-book-15784263.html"))
+        api = GoodreadsClient(cache=False)
+        api.show(15784263, details_db)
+        details = api.show("15784263", details_db)
+
+        assert m.call_count == 1
+        assert details.rating == 3.79
+
+        api.show(15784263, details_db, max_age=timedelta(0))
+        assert m.call_count == 2
+
+
+@pytest.fixture
+def book_pages():
+    """Mock the goodreads book pages in the test data."""
+    with requests_mock.Mocker() as m:
+        for book_id in (5776788, 12813630, 15784263):
+            m.get(f"https://www.goodreads.com/book/show/{book_id}",
+                  text=get_filecontents(f"goodreads-book-{book_id}.html"))
+        yield m
+
+
+def test_prefetch(book_pages, details_db, monkeypatch):
+    """
+    GIVEN: search results that are being shown to the user
+    WHEN: GoodreadsClient.prefetch() is called with their ids
+    THEN: up to PREFETCH_LIMIT book pages should be requested in the background
+    AND: show() should return the prefetched details without another request
+    """
+    monkeypatch.setattr(GoodreadsClient, "PREFETCH_LIMIT", 2)
+    api = GoodreadsClient(cache=False)
+    futures = api.prefetch(["15784263", 5776788, 15784263, 12813630], details_db)
+
+    assert list(futures) == [15784263, 5776788]
+    wait(futures.values())
+    assert book_pages.call_count == 2
+
+    details = api.show(5776788, details_db)
+    assert details.rating == 3.94
+    assert book_pages.call_count == 2
+
+    api.stop_prefetch()
+    assert not api.prefetched
+
+
+def test_prefetch_other_arguments(book_pages, details_db, tmp_path, mocker,
+                                  monkeypatch):
+    """
+    GIVEN: book details that have been prefetched
+    WHEN: show() is called with another database or a max_age
+    THEN: the book page should be requested again instead of using the
+          prefetched details
+    AND: prefetch requests should time out and not be retried
+    """
+    monkeypatch.setattr(GoodreadsClient, "PREFETCH_LIMIT", 1)
+    send = mocker.spy(GoodreadsClient, "send")
+    api = GoodreadsClient(cache=False)
+    futures = api.prefetch([5776788], details_db)
+    wait(futures.values())
+
+    assert send.call_args.kwargs["timeout"] == GoodreadsClient.PREFETCH_TIMEOUT
+    assert send.call_args.kwargs["retries"] == 0
+
+    api.show(5776788, DB(tmp_path / "other.db"))
+    assert book_pages.call_count == 2
+
+    api.show(5776788, details_db, max_age=timedelta(0))
+    assert book_pages.call_count == 3
+
+    api.show(5776788, DB(details_db.DB_FILE))
+    assert book_pages.call_count == 3
+    api.stop_prefetch()
+
+
+def test_prefetch_failed(book_pages, details_db, monkeypatch):
+    """
+    GIVEN: a book whose prefetch request failed
+    WHEN: show() is called for it
+    THEN: the book page should be requested again with the normal retries
+    """
+    monkeypatch.setattr(GoodreadsClient, "PREFETCH_LIMIT", 1)
+    url = "https://www.goodreads.com/book/show/5776788"
+    book_pages.get(url, [
+        {"status_code": 503},
+        {"status_code": 503},
+        {"text": get_filecontents("goodreads-book-5776788.html")},
+    ])
+    monkeypatch.setattr("bookdash.clients.base_client.sleep", lambda _: None)
+
+    api = GoodreadsClient(cache=False)
+    futures = api.prefetch([5776788], details_db)
+    wait(futures.values())
+    assert futures[5776788].exception()
+
+    details = api.show(5776788, details_db)
+    assert details.rating == 3.94
+    assert book_pages.call_count == 3
+    api.stop_prefetch()
+
+
+def test_stop_prefetch(book_pages, details_db, monkeypatch):
+    """
+    GIVEN: book pages being prefetched one at a time
+    WHEN: stop_prefetch() is called while the first is being requested
+    THEN: the pages that have not been requested yet should be cancelled
+    """
+    monkeypatch.setattr(GoodreadsClient, "PREFETCH_LIMIT", 3)
+    started, release = Event(), Event()
+    text = get_filecontents("goodreads-book-15784263.html")
+
+    def slow_page(request, context):
+        started.set()
+        release.wait(5)
+        return text
+
+    book_pages.get("https://www.goodreads.com/book/show/15784263", text=slow_page)
+
+    api = GoodreadsClient(cache=False)
+    futures = api.prefetch([15784263, 5776788, 12813630], details_db, workers=1)
+    started.wait(5)
+    api.stop_prefetch()
+    release.set()
+
+    assert futures[15784263].result().title == "Dead Things"
+    assert futures[5776788].cancelled()
+    assert futures[12813630].cancelled()
+    assert book_pages.call_count == 1
+
+
+@pytest.fixture
+def cookies_file(tmp_path, monkeypatch):
+    """Return a temporary cookies file for the goodreads client."""
+    file = tmp_path / "cookies" / "goodreads.pkl"
+    monkeypatch.setattr(GoodreadsClient, "COOKIES_FILE", file)
+    return file
+
+
+def save_cookies(file, **expires_in):
+    """Save a login cookie named for each keyword, expiring in that many
+    seconds."""
+    now = datetime.today().timestamp()
+    CookieJar([
+        {"name": name.replace("_", "-"), "value": "1", "expiry": now + seconds}
+        for name, seconds in expires_in.items()
+    ], file=file).save()
+
+
+def test_restore_session_login(cookies_file, mocker):
+    """
+    GIVEN: cached login cookies that are not close to expiring
+    WHEN: .login() is called
+    THEN: the cookies should be added to the requests session
+    AND: no browser should be started
+    """
+    browser = mocker.patch("bookdash.clients.goodreads_client.Browser")
+    save_cookies(cookies_file, session_token=7 * 24 * 60 * 60)
+    api = GoodreadsClient()
+
+    assert api.login("", "") is True
+    assert not browser.called
+    assert api.session.cookies.get("session-token") == "1"
+    assert "expires" not in api.cookie_jar.get("session-token")
+
+
+@pytest.mark.parametrize("expires_in", [-1, 60 * 60])
+def test_restore_session_refresh(cookies_file, mocker, expires_in):
+    """
+    GIVEN: cached login cookies that have expired or expire within the
+           REFRESH_MARGIN
+    WHEN: .restore_session() is called
+    THEN: it should return False so that .login() logs in again
+    AND: no cookies should be added to the requests session
+    """
+    save_cookies(cookies_file, session_token=expires_in)
+    api = GoodreadsClient()
+
+    assert api.restore_session() is False
+    assert not api.session.cookies
+
+
+class FakeLoginBrowser:
+    """Browser stand-in that signs in to goodreads without a driver."""
+
+    def __init__(self):
+        self.driver = Stub(title="Goodreads")
+        self.current_url = "https://goodreads.com/ap/signin"
+        self.typed = []
+        self.waits = 0
+        self.cookies_waited = []
+        self.quit_ok = None
+
+    def get(self, url):
+        self.current_url = url
+
+    def get_cookies(self):
+        if self.current_url == "https://goodreads.com/":
+            expiry = datetime.today().timestamp() + 60 * 60
+            return [
+                {"name": "session-id", "value": "1", "expiry": expiry},
+                {"name": "session-token", "value": "1", "expiry": expiry},
+            ]
+        return []
+
+    def wait_clickable(self, xpath):
+        return Stub(click=lambda: None)
+
+    def wait_visible(self, xpath):
+        return "email field"
+
+    def find_xpath(self, xpath, quiet=False):
+        if quiet:
+            return None
+
+        def click():
+            self.current_url = "https://goodreads.com/"
+        return Stub(click=click)
+
+    def type_slowly(self, field, text):
+        self.typed.append((field, text))
+
+    def wait(self, condition, timeout=None, message=""):
+        self.waits += 1
+        return True
+
+    def wait_cookie(self, name):
+        self.cookies_waited.append(name)
+        return {"name": name, "value": "1"}
+
+    def quit(self, ok=True):
+        self.quit_ok = ok
+
+
+def test_sign_in_phases(cookies_file, mocker):
+    """
+    GIVEN: no cached login cookies
+    WHEN: .login() is called
+    THEN: the signin form should be filled in with the typing profile given
+    AND: the time of each phase of the login should be recorded
+    AND: the session cookies should be waited for
+    AND: the browser should be quit
+    """
+    browser = FakeLoginBrowser()
+    open_browser = mocker.patch.object(
+        GoodreadsClient, "open_browser", return_value=browser
+    )
+    api = GoodreadsClient()
+
+    result = api.login("reader@example.com", "secret", typing="fast")
+
+    open_browser.assert_called_once_with("fast")
+    assert result == "https://goodreads.com/"
+    assert browser.typed[0] == ("email field", "reader@example.com")
+    assert browser.waits == 1
+    assert browser.cookies_waited == ["session-token"]
+    assert browser.quit_ok is True
+    assert list(api.timer.phases) == [
+        "restore session", "start browser", "signin page", "email form",
+        "typing", "submit", "session cookie",
+    ]
+    assert api.cookie_jar.has("session-token")
+
+
+def test_sign_in_failed(cookies_file, mocker):
+    """
+    GIVEN: a signin form that gets no response
+    WHEN: .login() is called
+    THEN: the wait should time out
+    AND: the browser should still be quit, as failed
+    """
+    browser = FakeLoginBrowser()
+    mocker.patch.object(
+        browser, "wait", side_effect=TimeoutException("No response to signin.")
+    )
+    mocker.patch.object(GoodreadsClient, "open_browser", return_value=browser)
+    api = GoodreadsClient()
+
+    with pytest.raises(TimeoutException):
+        api.login("reader@example.com", "secret")
+
+    assert browser.quit_ok is False
+    assert "session cookie" not in api.timer.phases
+
+
+def test_sign_in_restored(cookies_file, mocker):
+    """
+    GIVEN: cached login cookies that are not close to expiring
+    WHEN: .login() is called
+    THEN: only the restore session phase should be timed
+    """
+    open_browser = mocker.patch.object(GoodreadsClient, "open_browser")
+    save_cookies(cookies_file, session_token=7 * 24 * 60 * 60)
+    api = GoodreadsClient()
+
+    assert api.login("", "") is True
+    assert not open_browser.called
+    assert list(api.timer.phases) == ["restore session"]
+
+
+def test_auth_marker():
+    """
+    GIVEN: a goodreads client
+    WHEN: .auth_marker() is called before and after the session cookies are set
+    THEN: the marker should only be set when the session is logged in
+    """
+    api = GoodreadsClient(cache=False)
+    assert api.auth_marker() == ""
+
+    api.session.cookies.set("session-token", "1")
+    assert api.auth_marker() == "session"
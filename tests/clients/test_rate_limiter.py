@@ -0,0 +1,31 @@
+import pytest
+
+from bookdash.clients.rate_limiter import TokenBucket, bucket_for
+
+
+def test_token_bucket_burst():
+    """
+    GIVEN: a full token bucket
+    WHEN: up to burst tokens are acquired
+    THEN: they should be acquired without waiting
+    AND: the next should wait for a token to be added
+    """
+    bucket = TokenBucket(rate=100, burst=3)
+
+    assert [bucket.wait_time() for _ in range(3)] == [0, 0, 0]
+    assert 0 < bucket.wait_time() <= 0.01
+
+
+def test_token_bucket_acquire(mocker):
+    sleep = mocker.patch("bookdash.clients.rate_limiter.sleep")
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    mocker.patch.object(bucket, "wait_time", side_effect=[0.5, 0])
+
+    assert bucket.acquire() == 0.5
+    sleep.assert_called_once_with(0.5)
+
+
+def test_bucket_for():
+    assert bucket_for("a.com", 1, 5) is bucket_for("a.com", 1, 5)
+    assert bucket_for("a.com", 1, 5) is not bucket_for("b.com", 1, 5)
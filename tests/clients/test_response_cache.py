@@ -0,0 +1,146 @@
+import requests_mock
+import pytest
+
+from bookdash.clients.base_client import BaseClient
+from bookdash.clients.response_cache import ResponseCache
+from bookdash.db import dispose_engines
+
+bp = breakpoint
+
+URL = "https://example.com/search"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Return a ResponseCache in a temporary file."""
+    yield ResponseCache(tmp_path / "cache.db", ttls={"/search": 60})
+    dispose_engines()
+
+
+@pytest.fixture
+def api(cache):
+    """Return a BaseClient that uses cache."""
+    return BaseClient(cache=cache)
+
+
+def test_cache_key(cache):
+    assert cache.key("get", URL, {"q": "a"}) == cache.key("GET", f"{URL}?q=a")
+    assert cache.key("GET", URL, {"q": "a"}) != cache.key("GET", URL, {"q": "b"})
+    assert cache.key("GET", URL, auth="session") != cache.key("GET", URL)
+
+
+@pytest.mark.parametrize(("url", "expected"), [
+    ("https://example.com/search?q=a", 60),
+    ("https://example.com/book/show/1", ResponseCache.DEFAULT_TTL),
+])
+def test_cache_ttl(cache, url, expected):
+    assert cache.ttl(url) == expected
+
+
+def test_cached_request(api):
+    """
+    GIVEN: a client with a response cache
+    WHEN: the same request is made twice
+    THEN: the second response should come from the cache
+    """
+    with requests_mock.Mocker() as m:
+        m.get(URL, text="results")
+        first = api.get(URL, params={"q": "ender"})
+        second = api.get(URL, params={"q": "ender"})
+
+    assert m.call_count == 1
+    assert second.from_cache
+    assert second.text == first.text == "results"
+    assert second.request.path_url == "/search?q=ender"
+    assert api.responses == [first, second]
+
+
+@pytest.mark.parametrize("cache_control", ["no-store", "private, max-age=60"])
+def test_cached_request_no_store(api, cache_control):
+    """
+    GIVEN: a client with a response cache
+    WHEN: a response is marked no-store or private
+    THEN: it should not be stored
+    """
+    with requests_mock.Mocker() as m:
+        m.get(URL, text="results", headers={"Cache-Control": cache_control})
+        api.get(URL)
+        response = api.get(URL)
+
+    assert m.call_count == 2
+    assert not getattr(response, "from_cache", False)
+
+
+def test_cached_request_auth(api, mocker):
+    """
+    GIVEN: a response cached for an anonymous session
+    WHEN: the same request is made after logging in
+    THEN: the response should not come from the cache
+    """
+    with requests_mock.Mocker() as m:
+        m.get(URL, text="results")
+        api.get(URL)
+        mocker.patch.object(api, "auth_marker", return_value="session")
+        response = api.get(URL)
+
+    assert m.call_count == 2
+    assert not getattr(response, "from_cache", False)
+
+
+def test_cached_request_revalidate(api, cache, mocker):
+    """
+    GIVEN: a stale cached response with an ETag
+    WHEN: the request is made again
+    THEN: a conditional request should be sent
+    AND: the cached content should be returned on 304 Not Modified
+    """
+    with requests_mock.Mocker() as m:
+        m.get(URL, text="results", headers={"ETag": '"v1"'})
+        api.get(URL)
+
+    mocker.patch.object(cache, "fresh", return_value=False)
+    with requests_mock.Mocker() as m:
+        m.get(URL, status_code=304)
+        response = api.get(URL)
+
+    assert m.last_request.headers["If-None-Match"] == '"v1"'
+    assert response.from_cache
+    assert response.status_code == 200
+    assert response.text == "results"
+
+
+def test_cached_request_disabled():
+    """
+    GIVEN: a client created with cache=False
+    WHEN: the same request is made twice
+    THEN: both requests should be sent
+    """
+    api = BaseClient(cache=False)
+    with requests_mock.Mocker() as m:
+        m.get(URL, text="results")
+        api.get(URL)
+        api.get(URL)
+
+    assert api.cache is None
+    assert m.call_count == 2
+
+
+def test_cache_evict(tmp_path, api):
+    """
+    GIVEN: a cache with a maximum size
+    WHEN: more content than that is stored
+    THEN: the least recently used responses should be evicted
+    """
+    api.cache.max_size = 25
+
+    with requests_mock.Mocker() as m:
+        for name in "abc":
+            m.get(f"https://example.com/{name}", text=name * 10)
+        api.get("https://example.com/a")
+        api.get("https://example.com/b")
+        api.get("https://example.com/a")
+        api.get("https://example.com/c")
+
+    assert api.cache.size() == 20
+    assert api.cache.get(api.cache.key("GET", "https://example.com/a"))
+    assert not api.cache.get(api.cache.key("GET", "https://example.com/b"))
@@ -1,8 +1,30 @@
 import pytest
 
+from bookdash.clients.goodreads_client import GoodreadsClient
+
 from . import get_filecontents
 
 
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path, monkeypatch):
+    """Keep the response cache for each test in its own temporary file."""
+    file = tmp_path / "cache" / "goodreads.db"
+    monkeypatch.setattr(GoodreadsClient, "CACHE_FILE", file)
+    return file
+
+
+@pytest.fixture(autouse=True)
+def rate_limit(monkeypatch):
+    """Don't wait between mocked goodreads requests."""
+    monkeypatch.setattr(GoodreadsClient, "RATE_LIMIT", None)
+
+
+@pytest.fixture(autouse=True)
+def prefetch_limit(monkeypatch):
+    """Don't request book pages in the background unless a test asks to."""
+    monkeypatch.setattr(GoodreadsClient, "PREFETCH_LIMIT", 0)
+
+
 @pytest.fixture
 def filecontents(request):
     """Return the contents of a file (via indirect parametrization)."""
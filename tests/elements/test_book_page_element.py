@@ -2,6 +2,7 @@ import lxml.html
 import pytest
 
 from bookdash.elements.book_page_element import BookPageElement
+from tests import get_filecontents
 
 
 @pytest.mark.parametrize("filecontents",
@@ -19,13 +20,153 @@ def test_title(filecontents):
 @pytest.mark.parametrize("filecontents",
                          [{'filename': "goodreads-book-15784263.html"}],
                          indirect=True)
-def test_no_rating(filecontents):
+def test_rating(filecontents):
     book = BookPageElement(filecontents)
-    assert not book.rating
+    assert book.rating == 3.79
+    assert book.ratings_count == 5013
 
 
 @pytest.mark.parametrize("filecontents",
                          [{'filename': "goodreads-book-5776788.html"}],
                          indirect=True)
 def test_with_rating(filecontents):
-    ...
+    book = BookPageElement(filecontents)
+    assert book.rating == 3.94
+    assert book.ratings_count == 36043
+
+
+@pytest.mark.parametrize(("filename", "expected"), [
+    ("goodreads-book-15784263.html", {
+        "pages": 295,
+        "format": "Mass Market Paperback",
+        "publication": "First published February 5, 2013",
+    }),
+    ("goodreads-book-5776788.html", {
+        "pages": 388,
+        "format": "Hardcover",
+    }),
+    ("goodreads-book-12813630.html", {
+        "title": "The Coldest Girl in Coldtown",
+        "author": "Holly Black",
+        "rating": 3.84,
+        "ratings_count": 60497,
+        "pages": 419,
+        "format": "Hardcover",
+        "publication": "Published September 3rd 2013 by Little, Brown Books "
+                       "for Young Readers",
+    }),
+])
+def test_details(filename, expected):
+    """
+    GIVEN: a current or older Goodreads book page
+    WHEN: BookPageElement.details() is called
+    THEN: the book attributes should be parsed from the page
+    """
+    book = BookPageElement(get_filecontents(filename))
+    details = book.details()
+
+    assert set(details) == set(BookPageElement.DETAILS)
+    assert {key: details[key] for key in expected} == expected
+    assert details["genres"]
+    assert len(details["genres"]) == len(set(details["genres"]))
+
+
+@pytest.mark.parametrize(("filename", "book_id"), [
+    ("goodreads-book-5776788.html", 5776788),
+    ("goodreads-book-12813630.html", 12813630),
+    ("goodreads-book-15784263.html", 15784263),
+])
+def test_parsed_once(filename, book_id, mocker):
+    """
+    GIVEN: a Goodreads book page
+    WHEN: a BookPageElement is created and its fields are accessed
+    THEN: the page should only be parsed once
+    """
+    from bookdash.elements import element
+
+    parse = mocker.spy(element, "parse")
+    book = BookPageElement(get_filecontents(filename))
+
+    assert book.id == book_id
+    assert book.title
+    assert book.doc is book.element
+    assert parse.call_count == 1
+
+
+@pytest.mark.parametrize("filename", [
+    "goodreads-book-5776788.html",
+    "goodreads-book-15784263.html",
+])
+def test_page_data(filename, mocker):
+    """
+    GIVEN: a Goodreads book page with embedded JSON page data
+    WHEN: a BookPageElement is created and its details are accessed
+    THEN: the fields should be read from the page data
+    AND: the page should not be parsed
+    """
+    from bookdash.elements import element
+
+    parse = mocker.spy(element, "parse")
+    book = BookPageElement(get_filecontents(filename))
+    details = book.details()
+
+    assert parse.call_count == 0
+    assert book.data
+    assert details["genres"] == book.data["genres"]
+    assert {key: details[key] for key in book.data} == book.data
+
+
+@pytest.mark.parametrize("filename", [
+    "goodreads-book-5776788.html",
+    "goodreads-book-15784263.html",
+])
+def test_page_data_missing(filename):
+    """
+    GIVEN: a Goodreads book page without the embedded JSON page data
+    WHEN: a BookPageElement is created
+    THEN: the same fields should be parsed from the page markup
+    """
+    text = get_filecontents(filename)
+    book = BookPageElement(text)
+    fallback = BookPageElement(text.replace(BookPageElement.DATA_MARKER, "<script>"))
+
+    assert not fallback.data
+    for name in BookPageElement.DETAILS:
+        if name == "genres":
+            # the page only shows the first few genres
+            assert set(fallback.genres) <= set(book.genres)
+        else:
+            assert getattr(fallback, name) == getattr(book, name)
+
+
+@pytest.mark.parametrize(("position", "expected"), [
+    ('"1"', 1),
+    ("1", 1),
+    ('"1-3"', "1-3"),
+])
+def test_page_data_series_number(position, expected):
+    """
+    GIVEN: page data whose series position is a string or a number
+    WHEN: page_data() is called
+    THEN: whole numbers should be read as an int and others kept as they are
+    """
+    text = get_filecontents("goodreads-book-15784263.html")
+    text = text.replace('"userPosition":"1"', f'"userPosition":{position}')
+
+    assert BookPageElement.page_data(text)["number"] == expected
+
+
+def test_publication_text():
+    """
+    GIVEN: work and edition details from the page data
+    WHEN: publication_text() is called
+    THEN: the first publication date of the work should be preferred
+    """
+    work = {"publicationTime": 1360051200000}
+    edition = {"publicationTime": 1248159600000}
+
+    assert BookPageElement.publication_text(work, edition) == \
+        "First published February 5, 2013"
+    assert BookPageElement.publication_text({}, edition) == \
+        "Published July 21, 2009"
+    assert BookPageElement.publication_text(None, {}) is None
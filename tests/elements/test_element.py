@@ -1,11 +1,23 @@
 import lxml.html
 import pytest
 
-from bookdash.elements.element import Element
+from bookdash.elements import element
+from bookdash.elements.book_page_element import BookPageElement
+from bookdash.elements.element import Element, compile_xpath, selectors
+from bookdash.elements.found_book_element import FoundBookElement
 
 #  from .. import filecontents
 
 
+@pytest.fixture
+def selector_registry(monkeypatch):
+    """Register element classes defined in a test in a copy of the selector
+    registry, so that they are forgotten afterwards."""
+    monkeypatch.setattr(element, "_selector_classes",
+                        list(element._selector_classes))
+    monkeypatch.setattr(element, "_xpaths", dict(element._xpaths))
+
+
 @pytest.mark.parametrize("filecontents", [
     {'filename': "dice.html"}
 ], indirect=True)
@@ -44,3 +56,56 @@ def test_element_first(filecontents):
 def test_element_attr(filecontents):
     doc = Element(filecontents)
     assert doc.attr("//h2", "id") == "result"
+
+
+def test_compile_xpath():
+    """
+    GIVEN: the same xpath
+    WHEN: compile_xpath() is called twice
+    THEN: the compiled XPath is reused
+    """
+    xpath = compile_xpath("//h2/text()")
+    assert compile_xpath("//h2/text()") is xpath
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "dice.html"}
+], indirect=True)
+def test_element_xpath_plain_strings(filecontents):
+    """
+    GIVEN: an Element
+    WHEN: .xpath() returns text
+    THEN: it is a plain str that does not keep its parent element
+    """
+    doc = Element(filecontents)
+    assert type(doc.first("//h2/text()")) is str
+
+
+@pytest.mark.parametrize("filecontents", [
+    {'filename': "dice.html"}
+], indirect=True)
+def test_element_selector_name(filecontents, selector_registry):
+    """
+    GIVEN: an Element subclass with SELECTORS
+    WHEN: .first() and .attr() are called with a selector name
+    THEN: the selector's xpath is used
+    """
+    class Dice(Element):
+        SELECTORS = {"result": "//h2"}
+
+    doc = Dice(filecontents)
+    assert doc.first("result").text == "5"
+    assert doc.attr("result", "id") == "result"
+    assert Dice.selector("result") is compile_xpath("//h2")
+    assert selectors()["Dice"] == {"result": "//h2"}
+
+
+def test_selectors():
+    """
+    GIVEN: the element classes
+    WHEN: selectors() is called
+    THEN: every class's SELECTORS are returned by class name
+    """
+    assert selectors()["FoundBookElement"] == FoundBookElement.SELECTORS
+    assert selectors()["BookPageElement"] == BookPageElement.SELECTORS
+    assert "Dice" not in selectors()
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+
+from bookdash.models.book_details import BookDetails
+
+
+def test_from_details():
+    """
+    GIVEN: the details parsed from a book page
+    WHEN: BookDetails.from_details() is called
+    THEN: genres should be stored as one string
+    AND: the series number should be stored as a string
+    """
+    details = BookDetails.from_details({
+        "id": 15784263,
+        "title": "Dead Things",
+        "number": 1,
+        "genres": ["Urban Fantasy", "Fantasy", "Horror"],
+    })
+
+    assert details.genres == "Urban Fantasy, Fantasy, Horror"
+    assert details.genre_list == ["Urban Fantasy", "Fantasy", "Horror"]
+    assert details.number == "1"
+    assert details.fetched_at.tzinfo is timezone.utc
+
+
+def test_fresh():
+    """
+    GIVEN: details fetched two days ago, read back from sqlite without a
+           timezone
+    WHEN: fresh() is called
+    THEN: it should compare the age to max_age
+    """
+    fetched_at = datetime.now(timezone.utc) - timedelta(days=2)
+    details = BookDetails(id=1, fetched_at=fetched_at.replace(tzinfo=None))
+
+    assert details.fresh(timedelta(days=3))
+    assert not details.fresh(timedelta(days=1))
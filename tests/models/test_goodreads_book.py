@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+from bookdash.csv_file import CsvFile
+from bookdash.models.goodreads_book import (GoodreadsBook, RowConverter,
+                                            converter_for, csv_to_attrs,
+                                            from_csv)
+
+from .. import DATADIR
+
+CSV_FILE = DATADIR / "goodreads-library-export.csv"
+
+
+@pytest.fixture
+def csv():
+    """Return the loaded Goodreads library export."""
+    csv = CsvFile(CSV_FILE)
+    csv.read()
+    return csv
+
+
+def test_csv_to_attrs(csv):
+    """
+    GIVEN: a row from a Goodreads library export
+    WHEN: csv_to_attrs() is called
+    THEN: headings should be converted to attribute names
+    AND: values should be transformed
+    """
+    attrs = csv_to_attrs(csv[2])
+
+    assert attrs["id"] == 774928
+    assert attrs["title"] == "Rendezvous with Rama (Rama, #1)"
+    assert attrs["author_last_first"] == "Clarke, Arthur C."
+    assert attrs["isbn"] == "0553287893"
+    assert attrs["original_year_published"] == 1973
+    assert attrs["additional_authors"] is None
+    assert isinstance(attrs["date_added"], date)
+
+
+def test_from_csv(csv):
+    book = from_csv(csv[1])
+    assert isinstance(book, GoodreadsBook)
+    assert book.title == "Station Eleven"
+
+
+def test_converter_for_cached(csv):
+    """
+    GIVEN: rows from the same CSV file
+    WHEN: converter_for() is called with their headings
+    THEN: the same compiled RowConverter should be returned
+    """
+    assert converter_for(tuple(csv[0])) is converter_for(tuple(csv[1]))
+
+
+def test_row_converter_raw(csv):
+    """
+    GIVEN: a RowConverter compiled from the CSV headings
+    WHEN: .convert_many() is called with lists of values
+    THEN: the results should match converting the DictReader rows
+    """
+    raw_csv = CsvFile(CSV_FILE)
+    rows = raw_csv.stream(raw=True)
+    converter = RowConverter(raw_csv.headings)
+
+    assert converter.convert_many(rows) == [csv_to_attrs(row) for row in csv]
+
+
+def test_row_converter_columns(csv):
+    """
+    GIVEN: a RowConverter compiled with columns
+    WHEN: .convert() is called
+    THEN: the record should have exactly the keys in columns
+    """
+    columns = ("id", "title", "pages", "missing")
+    converter = RowConverter(tuple(csv[1]), columns=columns)
+
+    assert converter.convert(csv[1]) == {
+        "id": 21792828, "title": "Station Eleven", "pages": "354",
+        "missing": None,
+    }
+
+
+def test_row_converter_short_row():
+    """
+    GIVEN: a RowConverter
+    WHEN: .convert() is called with a row shorter than the headings
+    THEN: the missing values should be converted as blanks
+    """
+    converter = RowConverter(("Book Id", "Title", "ISBN"))
+    assert converter.convert(["1", "Dune"]) == {
+        "id": 1, "title": "Dune", "isbn": None,
+    }
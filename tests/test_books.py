@@ -20,38 +20,43 @@ def test_url():
     assert book.url == f"https://www.goodreads.com/book/show/{book_id}"
 
 
-def test_element_setter():
+def test_element_dropped():
+    """
+    GIVEN: a search results row element
+    WHEN: a Book is created from it
+    THEN: its attributes should be extracted
+    AND: the element should not be kept
+    """
     element = Stub(
         klass=FoundBookElement,
+        id="19089701",
         title="Vicious",
         author="V.E. Schwab"
     )
     book = Book(element)
 
-    assert book.element == element
+    assert book.id == "19089701"
+    assert not hasattr(book, "element")
+    assert not hasattr(book, "__dict__")
 
 
-def test_element_getter():
-    element = Stub(
-        klass=FoundBookElement,
-        title="Vicious",
-        author="V.E. Schwab"
-    )
-    book = Book()
-    book._element = element
+def test_to_dict():
+    """
+    GIVEN: a book
+    WHEN: .to_dict() is called
+    THEN: only the book attributes and score should be returned
+    """
+    book = Book(Stub(klass=FoundBookElement, id="19089701", title="Vicious",
+                     author="V.E. Schwab", series=None, number=None))
 
-    assert book.element == element
-
-
-def test_element_getter():
-    element = Stub(
-        klass=FoundBookElement,
-        title="Vicious",
-        author="V.E. Schwab"
-    )
-    book = Book(element)
-
-    assert book.element == element
+    assert book.to_dict() == {
+        "id": "19089701",
+        "title": "Vicious",
+        "author": "V.E. Schwab",
+        "series": None,
+        "number": None,
+        "score": None,
+    }
 
 
 def test_match():
@@ -60,3 +65,49 @@ def test_match():
     book.match({'title': "city of ghosts"})
     assert book.score == 1
     assert len(book.matches) == 1
+
+
+def test_from_row():
+    row = Stub(id=774928, title="Rendezvous with Rama (Rama, #1)",
+               author="Arthur C. Clarke")
+    book = Book.from_row(row)
+
+    assert book.id == 774928
+    assert book.title == "Rendezvous with Rama"
+    assert book.series == "Rama"
+    assert book.number == 1
+    assert book.author == "Arthur C. Clarke"
+
+
+def test_match_all():
+    """
+    GIVEN: several books
+    WHEN: Book.match_all() is called
+    THEN: each book should be scored the same as by .match()
+    """
+    books = [Book(), Book(), Book()]
+    for book, title in zip(books, ["City of Ghosts", "City of Bones", "Vicious"]):
+        book.title = title
+    params = {'title': "city of ghosts", 'author': None}
+
+    Book.match_all(books, params)
+    scores = [book.score for book in books]
+
+    for book in books:
+        book.match(params)
+    assert scores == [book.score for book in books]
+    assert scores[0] == 1
+    assert scores[0] > scores[1] > scores[2]
+
+
+def test_match_query():
+    """
+    GIVEN: a free text query
+    WHEN: .match() is called
+    THEN: the book should not be scored
+    """
+    book = Book()
+    book.title = "City of Ghosts"
+    book.match({'query': "city of ghosts"})
+    assert book.score == 0
+    assert book.matches == {}
@@ -1,3 +1,6 @@
+import re
+from fnmatch import fnmatch
+
 import pytest
 from selenium import webdriver
 from selenium.webdriver.chrome.webdriver import WebDriver
@@ -163,3 +166,141 @@ def test_browser_(browser):
     THEN: ...
     """
     assert browser
+
+
+def test_browser_blocked(browser):
+    """
+    GIVEN: A browser object.
+    WHEN: .options and .blocked_urls are accessed
+    THEN: images, fonts and media should not be loaded by default
+    """
+    prefs = browser.options.experimental_options["prefs"]
+
+    assert prefs["profile.managed_default_content_settings.images"] == 2
+    assert "*.woff*" in browser.blocked_urls
+    assert "*.mp4*" in browser.blocked_urls
+    assert Browser(block=[]).blocked_urls == []
+    assert "prefs" not in Browser(block=["fonts"]).options.experimental_options
+
+
+def test_browser_seleniumwire_options():
+    """
+    GIVEN: A browser object with hosts to exclude from capture
+    WHEN: .seleniumwire_options is accessed
+    THEN: the number of stored requests should be limited
+    AND: the hosts should be excluded
+    """
+    browser = Browser(exclude_hosts=["images.gr-assets.com"])
+    options = browser.seleniumwire_options
+
+    assert options["request_storage_max_size"] == Browser.REQUEST_STORAGE_MAX_SIZE
+    assert options["exclude_hosts"] == ["images.gr-assets.com"]
+
+
+def test_browser_blocked_query_string(browser):
+    """
+    GIVEN: A browser object.
+    WHEN: .blocked_urls is matched against an image URL with a query string
+    THEN: the image should be blocked
+    """
+    url = "https://images.gr-assets.com/books/1.png?v=3"
+    assert any(fnmatch(url, pattern) for pattern in browser.blocked_urls)
+
+
+@pytest.mark.parametrize(("url", "captured"), [
+    ("https://www.goodreads.com/user/sign_in", True),
+    ("https://www.goodreads.com/ads/banner", False),
+    ("https://www.amazon.com/ap/signin", False),
+])
+def test_browser_capture_scopes(url, captured):
+    """
+    GIVEN: A browser object with scopes and URLs to exclude from capture
+    WHEN: .capture_scopes is matched against a URL
+    THEN: only URLs in scope that are not excluded should be captured
+    """
+    browser = Browser(scopes=["goodreads\\.com"], exclude_urls=["/ads/"])
+    scopes = browser.capture_scopes
+
+    assert any(re.search(scope, url) for scope in scopes) is captured
+    assert Browser(scopes=["goodreads"]).capture_scopes == ["goodreads"]
+
+
+def test_browser_responses():
+    """
+    GIVEN: A browser object.
+    WHEN: more than RESPONSES_MAX pages are requested
+    THEN: only the most recent responses should be kept
+    """
+    browser = Browser()
+    browser.driver = Stub(get=lambda url: None)
+
+    for i in range(Browser.RESPONSES_MAX + 5):
+        browser.driver.last_request = Stub(response=i)
+        browser.get(f"http://localhost/{i}")
+
+    assert len(browser.responses) == Browser.RESPONSES_MAX
+    assert browser.last_response == Browser.RESPONSES_MAX + 4
+
+
+def test_browser_no_capture(mocker):
+    """
+    GIVEN: A browser object with capture disabled.
+    WHEN: .driver is accessed
+    THEN: a plain selenium driver should be started
+    AND: the blocked URLs should be sent to the browser
+    """
+    from bookdash import browser as module
+
+    chrome = mocker.patch.object(module.selenium_webdriver, "Chrome")
+    wire = mocker.patch.object(module.webdriver, "Chrome")
+    mocker.patch.object(module, "stealth")
+
+    driver = Browser(capture=False).driver
+
+    assert chrome.called and not wire.called
+    driver.execute_cdp_cmd.assert_any_call(
+        "Network.setBlockedURLs", {"urls": Browser().blocked_urls}
+    )
+
+
+def test_browser_type_fast(mocker):
+    """
+    GIVEN: A browser object with the fast typing profile
+    WHEN: .type_slowly() is called
+    THEN: the text should be sent all at once without waiting
+    """
+    sleep = mocker.patch("bookdash.browser.sleep")
+    field = mocker.Mock()
+
+    Browser(typing="fast").type_slowly(field, "hello")
+
+    field.send_keys.assert_called_once_with("hello")
+    assert not sleep.called
+
+
+def test_browser_wait_cookie():
+    """
+    GIVEN: A browser whose cookie is set after a few checks
+    WHEN: .wait_cookie() is called
+    THEN: the cookie should be returned once it is set
+    AND: TimeoutException should be raised if it is not set in time
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    checks = []
+
+    def get_cookie(name):
+        checks.append(name)
+        if len(checks) >= 3:
+            return {"name": name, "value": "1"}
+
+    browser = Browser()
+    browser.POLL_FREQUENCY = 0.01
+    browser.driver = Stub(get_cookie=get_cookie)
+
+    assert browser.wait_cookie("session-id")["value"] == "1"
+    assert checks == ["session-id"] * 3
+
+    with pytest.raises(TimeoutException, match="Cookie not set: other"):
+        browser.driver = Stub(get_cookie=lambda name: None)
+        browser.wait_cookie("other", timeout=0.05)
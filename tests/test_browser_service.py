@@ -0,0 +1,224 @@
+from threading import Thread
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from bookdash import browser_service
+from bookdash.browser import Browser
+from bookdash.browser_service import (BrowserService, ServiceNotRunning,
+                                      ServiceUnavailable)
+
+from . import Stub
+
+
+class FakeDriver:
+    """Web driver stand-in that records whether it was quit."""
+
+    def __init__(self, number: int):
+        self.session_id = f"session-{number}"
+        self.command_executor = Stub(
+            _client_config=Stub(remote_server_addr="http://127.0.0.1:9515")
+        )
+        self.crashed = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise WebDriverException("chrome not reachable")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def drivers():
+    """Return the list of fake drivers started by the service."""
+    return []
+
+
+@pytest.fixture
+def service(tmp_path, drivers):
+    """Run a browser service with fake drivers in a background thread."""
+    def factory():
+        drivers.append(FakeDriver(len(drivers) + 1))
+        return drivers[-1]
+
+    service = BrowserService(
+        factory=factory, socket_file=tmp_path / "b.sock", max_uses=3
+    )
+    thread = Thread(target=service.serve, daemon=True)
+    thread.start()
+    service.ready.wait(5)
+
+    yield service
+
+    service.stop()
+    thread.join(5)
+
+
+def test_lease(service, drivers):
+    """
+    GIVEN: a running browser service
+    WHEN: the browser is leased several times
+    THEN: each lease should attach to the same warm browser
+    """
+    for _ in range(2):
+        with browser_service.lease(service.socket_file) as lease:
+            assert lease.session_id == "session-1"
+            assert lease.executor_url == "http://127.0.0.1:9515"
+
+    assert len(drivers) == 1
+    assert service.uses == 2
+
+
+def test_lease_max_uses(service, drivers):
+    """
+    GIVEN: a running browser service
+    WHEN: the browser has been leased max_uses times
+    THEN: it should be quit and replaced by a new browser
+    """
+    session_ids = []
+    for _ in range(4):
+        with browser_service.lease(service.socket_file) as lease:
+            session_ids.append(lease.session_id)
+
+    assert session_ids == ["session-1"] * 3 + ["session-2"]
+    assert drivers[0].quit_called
+    assert not drivers[1].quit_called
+
+
+def test_lease_error(service, drivers):
+    """
+    GIVEN: a leased browser
+    WHEN: the lease ends with an error
+    OR: the client disconnects without releasing it
+    THEN: the browser should be replaced
+    """
+    with pytest.raises(RuntimeError):
+        with browser_service.lease(service.socket_file):
+            raise RuntimeError("login failed")
+
+    browser_service.lease(service.socket_file).close()
+    status = browser_service.send({"op": "status"}, service.socket_file)
+
+    assert status["session_id"] == "session-3"
+    assert status["leased"] is False
+    assert drivers[0].quit_called and drivers[1].quit_called
+
+
+def test_lease_crashed(service, drivers):
+    """
+    GIVEN: a browser service whose browser has crashed
+    WHEN: the browser is leased
+    THEN: a new browser should be started for the lease
+    """
+    drivers[0].crashed = True
+
+    with browser_service.lease(service.socket_file) as lease:
+        assert lease.session_id == "session-2"
+
+
+def test_lease_busy(service):
+    """
+    GIVEN: a browser that is already leased
+    WHEN: another lease is requested
+    THEN: it should wait for the browser to be released
+    AND: raise ServiceUnavailable if it is not released in time
+    """
+    with browser_service.lease(service.socket_file):
+        with pytest.raises(ServiceUnavailable):
+            browser_service.lease(service.socket_file, timeout=0.2)
+
+
+def test_lease_busy_service_timeout(service, monkeypatch):
+    """
+    GIVEN: a browser that is already leased
+    WHEN: another lease is requested with a longer timeout than the service's
+    THEN: the service should stop waiting for the browser and reply an error
+    """
+    monkeypatch.setattr(browser_service, "LEASE_TIMEOUT", 0.2)
+    with browser_service.lease(service.socket_file):
+        with pytest.raises(ServiceUnavailable, match="Timed out waiting"):
+            browser_service.lease(service.socket_file, timeout=5)
+
+    assert service.uses == 1
+
+
+def test_lease_not_running(tmp_path):
+    """
+    GIVEN: no browser service is running
+    WHEN: the browser is leased
+    THEN: ServiceNotRunning should be raised
+    """
+    with pytest.raises(ServiceNotRunning):
+        browser_service.lease(tmp_path / "b.sock")
+
+
+def test_leased_browser(service, mocker):
+    """
+    GIVEN: a Browser created with a lease
+    WHEN: it is quit
+    THEN: the leased browser should be released instead of quit
+    """
+    lease = browser_service.lease(service.socket_file)
+    browser = Browser(lease=lease)
+    browser.quit()
+
+    assert lease.released
+    assert service.uses == 1
+    assert not service.driver.quit_called
+
+
+def test_leased_browser_failed(service, drivers):
+    """
+    GIVEN: a Browser created with a lease
+    WHEN: it is quit after a failure
+    THEN: the leased browser should be replaced
+    """
+    browser = Browser(lease=browser_service.lease(service.socket_file))
+    browser.quit(ok=False)
+    status = browser_service.send({"op": "status"}, service.socket_file)
+
+    assert drivers[0].quit_called
+    assert status["session_id"] == "session-2"
+
+
+def test_open_browser(service, monkeypatch):
+    """
+    GIVEN: a running browser service
+    WHEN: GoodreadsClient.open_browser() is called
+    THEN: it should return a browser leased from the service
+    AND: a new browser if the service is not running
+    """
+    from bookdash.clients.goodreads_client import GoodreadsClient
+
+    monkeypatch.setattr(browser_service, "SOCKET_FILE", service.socket_file)
+    browser = GoodreadsClient().open_browser()
+    assert browser.lease.session_id == "session-1"
+    browser.quit()
+
+    missing = service.socket_file.with_name("missing.sock")
+    monkeypatch.setattr(browser_service, "SOCKET_FILE", missing)
+    browser = GoodreadsClient().open_browser()
+    assert browser.lease is None
+    assert not browser.started
+
+
+def test_open_browser_busy(service, monkeypatch):
+    """
+    GIVEN: a running browser service whose browser is already leased
+    WHEN: GoodreadsClient.open_browser() is called and the lease times out
+    THEN: ServiceUnavailable should be raised instead of starting a browser on
+          the profile the service is using
+    """
+    from bookdash.clients.goodreads_client import GoodreadsClient
+
+    monkeypatch.setattr(browser_service, "SOCKET_FILE", service.socket_file)
+    monkeypatch.setattr(browser_service, "LEASE_TIMEOUT", 0.2)
+    with browser_service.lease(service.socket_file):
+        with pytest.raises(ServiceUnavailable) as excinfo:
+            GoodreadsClient().open_browser()
+
+    assert not isinstance(excinfo.value, ServiceNotRunning)
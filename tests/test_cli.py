@@ -0,0 +1,162 @@
+import pytest
+import requests_mock
+from click.testing import CliRunner
+
+from bookdash.cli import main
+from bookdash.db import DB, dispose_engines
+from bookdash.importer import Importer
+
+from . import DATADIR, get_filecontents
+
+CSV_FILE = DATADIR / "goodreads-library-export.csv"
+
+
+@pytest.fixture
+def library_db(tmp_path, monkeypatch):
+    """Use a temporary library database with the CSV export imported."""
+    monkeypatch.setattr(DB, "DB_FILE", tmp_path / "library.db")
+    Importer(CSV_FILE).run()
+    yield
+    dispose_engines()
+
+
+def test_search_local_first_match(library_db):
+    """
+    GIVEN: a library containing the book searched for
+    WHEN: books --local-first is run
+    THEN: the library results should be shown without searching goodreads
+    """
+    runner = CliRunner()
+    with requests_mock.Mocker() as m:
+        result = runner.invoke(main, ["-L", "-t", "Station Eleven"], input="q\n")
+
+    assert not m.called
+    assert "Source: library" in result.output
+    assert "Station Eleven" in result.output
+
+
+def test_search_local_first_fallback(library_db):
+    """
+    GIVEN: a library that does not contain the book searched for
+    WHEN: books --local-first is run
+    THEN: goodreads should be searched
+    """
+    runner = CliRunner()
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search",
+              text=get_filecontents("goodreads-search.html"))
+        result = runner.invoke(main, ["-L", "-t", "ender's world"], input="q\n")
+
+    assert m.called
+    assert "Source: goodreads" in result.output
+    assert "Ender's World" in result.output
+
+
+def test_search_library_annotations(library_db):
+    """
+    GIVEN: a library containing some of the search results
+    WHEN: books is run
+    THEN: the shelf, rating and read count should be shown for owned books
+    """
+    runner = CliRunner()
+    result = runner.invoke(main, ["-l", "-t", "Station Eleven"], input="q\n")
+
+    row = next(line for line in result.output.splitlines()
+               if "Station Eleven" in line)
+    assert row.split()[-3:] == ["read", "4", "1"]
+
+
+def test_search_stream(library_db, mocker):
+    """
+    GIVEN: a goodreads search
+    WHEN: books --stream is run
+    THEN: the results should be printed in page order with library annotations
+    AND: the library should not be queried once per row
+    """
+    select_by_ids = mocker.spy(DB, "select_by_ids")
+    runner = CliRunner()
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search",
+              text=get_filecontents("goodreads-search.html"))
+        result = runner.invoke(main, ["--stream", "-t", "ender's game"], input="q\n")
+
+    lines = result.output.splitlines()
+    assert "Source: goodreads" in lines
+    assert lines[lines.index("Source: goodreads") + 2].split() == [
+        "#", "Title", "Author", "Series", "Shelf", "Rating", "Reads"
+    ]
+    assert lines[lines.index("Source: goodreads") + 4].startswith("1 ")
+    row = next(line for line in lines if line.startswith("3 "))
+    assert row.split()[-3:] == ["read", "5", "6"]
+    assert select_by_ids.call_count < 20
+
+
+def test_search_limit(library_db):
+    """
+    GIVEN: a goodreads search with more good matches than the limit
+    WHEN: books --limit is run
+    THEN: only limit results should be shown
+    """
+    runner = CliRunner()
+    with requests_mock.Mocker() as m:
+        m.get("https://www.goodreads.com/search",
+              text=get_filecontents("goodreads-search.html"))
+        result = runner.invoke(main, ["-n", "2", "-a", "orson scott card"],
+                               input="q\n")
+
+    lines = result.output.splitlines()
+    rows = lines[lines.index("Source: goodreads") + 4:-1]
+    assert [row.split()[0] for row in rows] == ["1", "2"]
+
+
+@pytest.mark.parametrize("option", ["--help", "-h"])
+def test_help(option):
+    """
+    GIVEN: the books command group
+    WHEN: it is run with only a help option
+    THEN: the group help listing every command should be shown
+    """
+    runner = CliRunner()
+    result = runner.invoke(main, [option])
+
+    assert result.exit_code == 0
+    assert "Commands:" in result.output
+    assert all(name in result.output for name in ("search", "import", "browser"))
+
+
+def test_search_no_arguments(mocker):
+    """
+    GIVEN: no search query or filters
+    WHEN: books is run
+    THEN: it should abort without searching goodreads
+    """
+    abort = mocker.patch("bookdash.cli.abort", side_effect=SystemExit(1))
+    runner = CliRunner()
+    with requests_mock.Mocker() as m:
+        result = runner.invoke(main, [])
+
+    assert not m.called
+    assert result.exit_code == 1
+    abort.assert_called_once_with("Received no search arguments.")
+
+
+@pytest.mark.parametrize("args", [
+    ["-n", "0", "ender's game"],
+    ["-n", "-1", "ender's game"],
+    ["-p", "0", "ender's game"],
+    ["browser", "-n", "0"],
+    ["import", "-n", "0", str(CSV_FILE)],
+])
+def test_count_options_positive(args):
+    """
+    GIVEN: a count option such as --limit or --max-uses
+    WHEN: it is less than 1
+    THEN: it should be rejected as a usage error
+    """
+    runner = CliRunner()
+    with requests_mock.Mocker() as m:
+        result = runner.invoke(main, args)
+
+    assert not m.called
+    assert result.exit_code == 2
+    assert "minimum valid value 1" in result.output
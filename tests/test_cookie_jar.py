@@ -178,3 +178,60 @@ def test_cookie_jar_ok(now, name, modifier, expected):
     jar = CookieJar([cookie])
 
     assert jar.ok(name) is expected
+
+
+def test_cookie_jar_for_session_unchanged():
+    """
+    GIVEN: a CookieJar with cookies in the format saved by the browser
+    WHEN: .for_session() is called
+    THEN: the cookies in the jar should not be changed
+    """
+    cookie = {"name": "a", "value": "1", "expiry": 1733534854,
+              "httpOnly": True, "sameSite": "Lax"}
+    jar = CookieJar([cookie.copy()])
+
+    jar.for_session(requests.session())
+    jar.for_session(requests.session())
+
+    assert jar.get("a") == cookie
+
+
+def test_cookie_jar_expires_at(now):
+    """
+    GIVEN: a cookie jar with cookies that expire at different times
+    WHEN: .expires_at() is called
+    THEN: it should return the earliest expiry of the named cookies
+    OR: of all cookies if no names are given
+    """
+    jar = CookieJar([
+        {"name": "a", "value": "1", "expiry": now + 10},
+        {"name": "b", "value": "2", "expiry": str(now + 20)},
+        {"name": "c", "value": "3"},
+    ])
+
+    assert jar.expires_at() == now + 10
+    assert jar.expires_at("b", "c") == now + 20
+    assert jar.expires_at("c") is None
+
+
+@pytest.mark.parametrize(("names", "margin", "expected"), [
+    (["a-cookie"], 0, True),
+    (["a-cookie"], 60, False),
+    (["a-cookie", "b-cookie"], 60, False),
+    (["b-cookie"], 0, False),
+])
+def test_cookie_jar_ok_margin(now, names, margin, expected):
+    """
+    GIVEN: a cookie jar with a required cookie that expires soon
+    AND: another cookie that has already expired
+    WHEN: .ok() is called with the required cookie names and a margin
+    THEN: only the required cookies should be checked
+    AND: it should return False if any expire within margin seconds
+    """
+    jar = CookieJar([
+        {"name": "a-cookie", "value": "1", "expiry": now + 30},
+        {"name": "b-cookie", "value": "2", "expiry": now - 1},
+        {"name": "other", "value": "3", "expiry": now - 1},
+    ])
+
+    assert jar.ok(*names, margin=margin) is expected
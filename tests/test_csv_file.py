@@ -0,0 +1,77 @@
+import pytest
+
+from bookdash.csv_file import CsvFile
+
+from . import DATADIR
+
+CSV_FILE = DATADIR / "goodreads-library-export.csv"
+
+
+def test_csv_file_read():
+    """
+    GIVEN: a CsvFile
+    WHEN: .read() is called
+    THEN: every row should be loaded into the list as a dictionary
+    """
+    csv = CsvFile(CSV_FILE)
+    csv.read()
+
+    assert csv.loaded
+    assert len(csv) == 1451
+    assert csv[1]["Title"] == "Station Eleven"
+
+
+def test_csv_file_stream():
+    """
+    GIVEN: a CsvFile
+    WHEN: .stream() is called
+    THEN: it should yield the same rows as .read() without loading them
+    """
+    csv = CsvFile(CSV_FILE)
+    rows = list(csv.stream())
+
+    assert not csv.loaded
+    assert not csv.data
+
+    csv.read()
+    assert rows == csv.data
+
+
+def test_csv_file_stream_chunks():
+    """
+    GIVEN: a CsvFile
+    WHEN: .stream() is called with a chunk_size
+    THEN: it should yield lists of at most chunk_size rows
+    """
+    csv = CsvFile(CSV_FILE)
+    chunks = list(csv.stream(500))
+
+    assert [len(c) for c in chunks] == [500, 500, 451]
+    assert chunks[0][1]["Title"] == "Station Eleven"
+
+
+def test_csv_file_lazy():
+    """
+    GIVEN: a lazy CsvFile
+    WHEN: len() is called or it is iterated
+    THEN: rows should be counted and streamed without being loaded
+    """
+    csv = CsvFile(CSV_FILE, lazy=True)
+
+    assert len(csv) == 1451
+    assert sum(1 for _ in csv) == 1451
+    assert not csv.data
+
+
+def test_csv_file_empty(tmp_path):
+    """
+    GIVEN: an empty file
+    WHEN: a lazy CsvFile is counted or iterated
+    THEN: it should have no rows
+    """
+    file = tmp_path / "empty.csv"
+    file.touch()
+    csv = CsvFile(file, lazy=True)
+
+    assert len(csv) == 0
+    assert list(csv) == []
@@ -1,6 +1,137 @@
-from bookdash.db import DB
+import pytest
+from sqlalchemy import text
+from sqlmodel import select
+
+from bookdash.db import DB, dispose_engines
+from bookdash.models.goodreads_book import GoodreadsBook
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Return a DB with its own temporary database file."""
+    db = DB(tmp_path / "library.db")
+    db.create()
+    yield db
+    dispose_engines()
 
 
 def test_db():
     db = DB()
     assert db
+
+
+def test_db_engine_cached(db, tmp_path):
+    """
+    GIVEN: two DB objects for the same database file
+    WHEN: .engine is accessed
+    THEN: the same engine should be returned
+    AND: a DB for a different file should get a different engine
+    """
+    assert db.engine is db.engine
+    assert DB(tmp_path / "library.db").engine is db.engine
+    assert DB(tmp_path / "other.db").engine is not db.engine
+
+
+@pytest.mark.parametrize(("pragma", "expected"), [
+    ("journal_mode", "wal"),
+    ("synchronous", 1),
+    ("cache_size", -64000),
+])
+def test_db_pragmas(db, pragma, expected):
+    """
+    GIVEN: a DB object
+    WHEN: a connection is made
+    THEN: the configured pragmas should be set
+    """
+    with db.engine.connect() as conn:
+        assert conn.execute(text(f"PRAGMA {pragma}")).scalar() == expected
+
+
+def test_db_session_scope(db):
+    """
+    GIVEN: a DB object
+    WHEN: rows are added in a .session_scope() block
+    THEN: they should be committed when the block exits
+    """
+    with db.session_scope() as session:
+        session.add(GoodreadsBook(id=1, title="Vicious", author="V.E. Schwab",
+                                  author_last_first="Schwab, V.E."))
+
+    row = db.select_one(GoodreadsBook, GoodreadsBook.id == 1)
+    assert row.title == "Vicious"
+
+
+def test_db_session_scope_rollback(db):
+    """
+    GIVEN: a DB object
+    WHEN: an exception is raised in a .session_scope() block
+    THEN: the changes should be rolled back
+    """
+    with pytest.raises(ValueError):
+        with db.session_scope() as session:
+            session.add(GoodreadsBook(id=1, title="Vicious",
+                                      author="V.E. Schwab",
+                                      author_last_first="Schwab, V.E."))
+            session.flush()
+            raise ValueError()
+
+    with db.session_scope() as session:
+        assert not session.exec(select(GoodreadsBook)).all()
+
+
+def test_db_migrate(tmp_path):
+    """
+    GIVEN: a database with a table that is missing a model's column
+    WHEN: .create() is called
+    THEN: the missing column should be added
+    """
+    db = DB(tmp_path / "old.db")
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE goodreadsbook (id INTEGER PRIMARY KEY)")
+
+    db.create()
+
+    with db.engine.connect() as conn:
+        result = conn.exec_driver_sql("PRAGMA table_info(goodreadsbook)")
+        columns = {row[1] for row in result}
+
+    assert "content_hash" in columns
+    assert "title" in columns
+    dispose_engines()
+
+
+def test_db_create_once(db, tmp_path, mocker):
+    """
+    GIVEN: a database whose tables have been created
+    WHEN: .create() is called again, from any DB for the same file
+    THEN: the tables should not be created or migrated again
+    AND: a DB for a different file should still be created
+    """
+    migrate = mocker.spy(DB, "migrate")
+    db.create()
+    DB(tmp_path / "library.db").create()
+    assert migrate.call_count == 0
+
+    DB(tmp_path / "other.db").create()
+    assert migrate.call_count == 1
+
+
+def test_db_select_by_ids(db, mocker):
+    """
+    GIVEN: a database with rows
+    WHEN: .select_by_ids() is called with a list of ids
+    THEN: the matching rows should be returned mapped by id
+    AND: only one query should be made
+    """
+    with db.session_scope() as session:
+        for i in range(1, 6):
+            session.add(GoodreadsBook(id=i, title=f"Book {i}", author="Anon",
+                                      author_last_first="Anon"))
+
+    execute = mocker.spy(db.engine.dialect, "do_execute")
+    rows = db.select_by_ids(GoodreadsBook, ["2", 4, 99, None])
+
+    assert execute.call_count == 1
+    assert sorted(rows) == [2, 4]
+    assert rows[4].title == "Book 4"
+    assert db.select_by_ids(GoodreadsBook, []) == {}
@@ -0,0 +1,159 @@
+import csv
+
+import pytest
+from sqlmodel import func, select
+
+from bookdash.db import DB, dispose_engines
+from bookdash.importer import Importer
+from bookdash.models.goodreads_book import GoodreadsBook
+from bookdash.models.import_run import ImportRun
+
+from . import DATADIR
+
+CSV_FILE = DATADIR / "goodreads-library-export.csv"
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Return a DB with its own temporary database file."""
+    db = DB(tmp_path / "library.db")
+    yield db
+    dispose_engines()
+
+
+@pytest.fixture
+def export(tmp_path):
+    """Return a function that writes a modified copy of the CSV export."""
+    with open(CSV_FILE, newline="") as fp:
+        rows = list(csv.reader(fp))
+
+    def write(rows=rows):
+        file = tmp_path / "export.csv"
+        with open(file, "w", newline="") as fp:
+            csv.writer(fp).writerows(rows)
+        return file
+
+    write.rows = rows
+    return write
+
+
+def count_rows(db):
+    """Return the number of GoodreadsBook rows."""
+    with db.session_scope() as session:
+        return session.exec(select(func.count(GoodreadsBook.id))).one()
+
+
+def test_importer_run(db):
+    """
+    GIVEN: a Goodreads library export CSV file
+    WHEN: Importer.run() is called
+    THEN: every row should be written to the database
+    AND: the import rate should be recorded
+    """
+    importer = Importer(CSV_FILE, db=db, chunk_size=100)
+    run = importer.run()
+
+    assert run.rows == 1451
+    assert run.inserted == 1451
+    assert count_rows(db) == 1451
+    assert importer.rate > 0
+
+    row = db.select_one(GoodreadsBook, GoodreadsBook.id == 21792828)
+    assert row.title == "Station Eleven"
+    assert row.exclusive_shelf == "read"
+    assert row.content_hash
+
+
+def test_importer_run_upsert(db):
+    """
+    GIVEN: a database that has already been imported into
+    WHEN: Importer.run() is called again
+    THEN: existing rows should be updated instead of duplicated
+    """
+    Importer(CSV_FILE, db=db).run()
+
+    with db.session_scope() as session:
+        book = session.get(GoodreadsBook, 21792828)
+        book.title = "Changed"
+        book.content_hash = "changed"
+
+    run = Importer(CSV_FILE, db=db).run()
+
+    assert run.updated == 1
+    assert count_rows(db) == 1451
+    row = db.select_one(GoodreadsBook, GoodreadsBook.id == 21792828)
+    assert row.title == "Station Eleven"
+
+
+def test_importer_run_unchanged(db):
+    """
+    GIVEN: a database that has already been imported into
+    WHEN: the same file is imported again
+    THEN: no rows should be written
+    AND: the import run should be recorded
+    """
+    Importer(CSV_FILE, db=db).run()
+    run = Importer(CSV_FILE, db=db).run()
+
+    assert run.unchanged == 1451
+    assert run.changed == 0
+
+    with db.session_scope() as session:
+        runs = session.exec(select(ImportRun)).all()
+    assert len(runs) == 2
+    assert runs[-1].summary() == run.summary()
+
+
+def test_importer_run_changes(db, export):
+    """
+    GIVEN: a database that has already been imported into
+    WHEN: a newer export with added, changed and removed rows is imported
+          with prune=True
+    THEN: only those rows should be inserted, updated or deleted
+    """
+    Importer(CSV_FILE, db=db).run()
+
+    heading, first, second, *rows = export.rows
+    first[1] = "A New Title"
+    new = list(second)
+    new[0] = "999999999"
+    file = export([heading, first, new, *rows])
+
+    run = Importer(file, db=db, prune=True).run()
+
+    assert (run.inserted, run.updated, run.deleted) == (1, 1, 1)
+    assert run.unchanged == 1449
+    assert count_rows(db) == 1451
+    assert not db.select_one(GoodreadsBook, GoodreadsBook.id == int(second[0]))
+    row = db.select_one(GoodreadsBook, GoodreadsBook.id == int(first[0]))
+    assert row.title == "A New Title"
+
+
+def test_importer_run_no_prune(db, export):
+    """
+    GIVEN: a database that has already been imported into
+    WHEN: a file missing rows is imported without prune
+    THEN: the missing rows should be kept
+    """
+    Importer(CSV_FILE, db=db).run()
+    file = export(export.rows[:10])
+
+    run = Importer(file, db=db).run()
+
+    assert run.deleted == 0
+    assert count_rows(db) == 1451
+
+
+def test_importer_run_prune_empty(db, export):
+    """
+    GIVEN: a database that has already been imported into
+    WHEN: a file with no rows is imported with prune=True
+    THEN: no rows should be deleted
+    """
+    Importer(CSV_FILE, db=db).run()
+    file = export(export.rows[:1])
+
+    run = Importer(file, db=db, prune=True).run()
+
+    assert run.deleted == 0
+    assert count_rows(db) == 1451
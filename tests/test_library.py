@@ -0,0 +1,115 @@
+import pytest
+
+from bookdash.db import DB, dispose_engines
+from bookdash.importer import Importer
+from bookdash.library import Library
+from bookdash.models.goodreads_book import GoodreadsBook
+
+from . import DATADIR
+
+CSV_FILE = DATADIR / "goodreads-library-export.csv"
+
+
+@pytest.fixture(scope="module")
+def library(tmp_path_factory):
+    """Return a Library with the CSV export imported."""
+    db = DB(tmp_path_factory.mktemp("library") / "library.db")
+    Importer(CSV_FILE, db=db).run()
+    yield Library(db)
+    dispose_engines()
+
+
+def test_library_search(library):
+    """
+    GIVEN: a library with imported books
+    WHEN: .search() is called with a query
+    THEN: matching books should be returned best match first
+    """
+    books = library.search("station eleven")
+
+    assert books
+    assert isinstance(books[0], GoodreadsBook)
+    assert books[0].title == "Station Eleven"
+
+
+def test_library_search_prefix(library):
+    """
+    GIVEN: a library with imported books
+    WHEN: .search() is called with the start of a word
+    THEN: books with words starting with it should match
+    """
+    books = library.search("rendezv")
+    assert "Rendezvous with Rama (Rama, #1)" in [b.title for b in books]
+
+
+def test_library_search_possessive(library):
+    """
+    GIVEN: a library with a book whose title has a possessive
+    WHEN: .search() is called with the possessive
+    THEN: the possessive "s" should not match every word starting with "s"
+    """
+    assert library.terms("Sorcerer's Stone") == '"sorcerer"* "stone"*'
+    books = library.search(title="sorcerer's stone")
+    assert books[0].title == "Harry Potter and the Sorcerer's Stone (Harry Potter, #1)"
+
+
+@pytest.mark.parametrize(("filters", "expected"), [
+    ({"title": "rama"}, "Rendezvous with Rama (Rama, #1)"),
+    ({"author": "clarke", "title": "rama"}, "Rendezvous with Rama (Rama, #1)"),
+    ({"series": "mortal instruments"}, "City of Bones (The Mortal Instruments, #1)"),
+])
+def test_library_search_filters(library, filters, expected):
+    """
+    GIVEN: a library with imported books
+    WHEN: .search() is called with column filters
+    THEN: books matching all filters should be returned
+    """
+    titles = [b.title for b in library.search(**filters)]
+    assert expected in titles
+
+
+def test_library_search_no_match(library):
+    assert library.search(author="clarke", title="station eleven") == []
+    assert library.search() == []
+
+
+def test_library_search_limit(library):
+    assert len(library.search("the", limit=3)) == 3
+
+
+def test_library_sync(library):
+    """
+    GIVEN: a library with imported books
+    WHEN: a book is changed or deleted
+    THEN: the index should be updated by the triggers
+    """
+    with library.db.session_scope() as session:
+        book = session.get(GoodreadsBook, 21792828)
+        book.title = "Zyzzyva Unmatched"
+
+    assert library.search("zyzzyva")[0].id == 21792828
+    assert not library.search("station eleven")
+
+    with library.db.session_scope() as session:
+        session.delete(session.get(GoodreadsBook, 21792828))
+
+    assert not library.search("zyzzyva")
+
+
+def test_library_create_existing_rows(tmp_path):
+    """
+    GIVEN: a database with books but no full-text index
+    WHEN: .create() is called
+    THEN: the existing books should be indexed
+    """
+    db = DB(tmp_path / "library.db")
+    db.create()
+    with db.session_scope() as session:
+        session.add(GoodreadsBook(id=1, title="Vicious", author="V.E. Schwab",
+                                  author_last_first="Schwab, V.E."))
+
+    library = Library(db)
+    library.create()
+
+    assert [b.id for b in library.search("vicious")] == [1]
+    dispose_engines()
@@ -0,0 +1,112 @@
+import pytest
+
+from bookdash.ranking import Ranker
+
+from . import Stub
+
+
+def books(*scores):
+    """Return a list of Stub books with scores."""
+    return [Stub(title=f"Book {i}", score=score) for i, score in enumerate(scores)]
+
+
+def test_ranker_top_k():
+    """
+    GIVEN: a Ranker with a limit
+    WHEN: more books than the limit are added
+    THEN: only the best scoring books should be kept, best first
+    """
+    ranker = Ranker(limit=3, threshold=0)
+    ranker.extend(books(0.5, 0.9, 0.1, 0.7, 0.8))
+
+    assert len(ranker) == 3
+    assert ranker.added == 5
+    assert [b.score for b in ranker.results()] == [0.9, 0.8, 0.7]
+
+
+def test_ranker_ties_keep_order():
+    """
+    GIVEN: books with the same score
+    WHEN: they are ranked
+    THEN: they should keep the order they were added in
+    """
+    ranker = Ranker(limit=2, threshold=0)
+    ranker.extend(books(1, 1, 1))
+
+    assert [b.title for b in ranker.results()] == ["Book 0", "Book 1"]
+
+
+def test_ranker_threshold():
+    """
+    GIVEN: books that score at or above the starting threshold
+    WHEN: .results() is called
+    THEN: only those books should be returned
+    AND: the Ranker should be satisfied
+    """
+    ranker = Ranker()
+    ranker.extend(books(0.2, 0.95, 0.5, 1.0))
+
+    assert ranker.threshold == Ranker.THRESHOLD
+    assert ranker.satisfied
+    assert [b.score for b in ranker.results()] == [1.0, 0.95]
+
+
+@pytest.mark.parametrize("scores, threshold, expected", [
+    ((0.8, 0.5, 0.2), 0.75, [0.8]),
+    ((0.62, 0.6, 0.2), 0.6, [0.62, 0.6]),
+    ((0.35, 0.1), 0.3, [0.35]),
+])
+def test_ranker_threshold_relaxed(scores, threshold, expected):
+    """
+    GIVEN: books that all score below the starting threshold
+    WHEN: .results() is called
+    THEN: the threshold should be relaxed until a book meets it
+    AND: the Ranker should not be satisfied
+    """
+    ranker = Ranker()
+    ranker.extend(books(*scores))
+
+    assert ranker.threshold == threshold
+    assert not ranker.satisfied
+    assert [b.score for b in ranker.results()] == expected
+
+
+def test_ranker_unfiltered():
+    """
+    GIVEN: books that all score below FLOOR
+    WHEN: .results() is called
+    THEN: the best books should be returned regardless of score
+    """
+    ranker = Ranker(limit=2)
+    ranker.extend(books(0.1, 0, 0.2))
+
+    assert ranker.threshold == 0
+    assert [b.score for b in ranker.results()] == [0.2, 0.1]
+
+
+def test_ranker_enough():
+    """
+    GIVEN: a Ranker that needs two matches
+    WHEN: only one book meets the starting threshold
+    THEN: the threshold should be relaxed to include a second book
+    """
+    ranker = Ranker(enough=2)
+    ranker.extend(books(1.0, 0.7, 0.1))
+
+    assert not ranker.satisfied
+    assert [b.score for b in ranker.results()] == [1.0, 0.7]
+
+    ranker.add(books(0.9)[0])
+    assert ranker.satisfied
+    assert [b.score for b in ranker.results()] == [1.0, 0.9]
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_ranker_invalid_limit(limit):
+    """
+    GIVEN: a limit less than 1
+    WHEN: a Ranker is created
+    THEN: ValueError should be raised
+    """
+    with pytest.raises(ValueError):
+        Ranker(limit)
@@ -0,0 +1,114 @@
+import pytest
+
+from bookdash.scoring import (Pattern, Scorer, normalize, partial_ratio, ratio,
+                              token_set_ratio, weighted_ratio)
+
+
+def lcs(a, b):
+    """Return the LCS length of a and b the slow way."""
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        row = [0]
+        for j, y in enumerate(b):
+            row.append(prev[j] + 1 if x == y else max(prev[j + 1], row[j]))
+        prev = row
+    return prev[-1]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("", ""),
+    ("", "abc"),
+    ("abc", ""),
+    ("enders game", "ender game"),
+    ("the name of the wind", "name of wind"),
+    ("aaaa", "aa"),
+    ("abcabcabc", "cbacbacba"),
+])
+def test_pattern_lcs(a, b):
+    """
+    GIVEN: two strings
+    WHEN: Pattern.lcs() is called
+    THEN: it should return the length of their longest common subsequence
+    """
+    assert Pattern(a).lcs(b) == lcs(a, b)
+
+
+def test_ratio():
+    """
+    GIVEN: two strings
+    WHEN: ratio() is called
+    THEN: the score is 1 for equal strings, 0 with nothing in common
+    """
+    assert ratio("abc", "abc") == 1.0
+    assert ratio("abc", "xyz") == 0.0
+    assert ratio("", "") == 1.0
+    assert 0 < ratio("city of ghosts", "city of bones") < 1
+
+
+def test_partial_ratio():
+    """
+    GIVEN: a short string contained in a longer one
+    WHEN: partial_ratio() is called
+    THEN: it should score a perfect match, regardless of argument order
+    """
+    assert partial_ratio("vicious", "vicious (villains, #1)") == 1.0
+    assert partial_ratio("vicious (villains, #1)", "vicious") == 1.0
+    assert partial_ratio("xyz", "vicious") == 0.0
+
+
+def test_token_set_ratio():
+    """
+    GIVEN: strings with the same words in a different order
+    WHEN: token_set_ratio() is called
+    THEN: it should score a perfect match
+    """
+    assert token_set_ratio("schwab ve", "ve schwab") == 1.0
+    assert token_set_ratio("ve schwab", "ve schwab victoria") == 1.0
+
+
+def test_weighted_ratio():
+    """
+    GIVEN: a title and a longer title that contains it
+    WHEN: weighted_ratio() is called
+    THEN: it should score higher than ratio(), but lower than an exact match
+    """
+    a, b = "enders game", "enders game boxed set enders game enders shadow"
+    assert ratio(a, b) < weighted_ratio(a, b) < 1.0
+    assert weighted_ratio(a, a) == 1.0
+
+
+def test_scorer_normalizes():
+    """
+    GIVEN: a Scorer
+    WHEN: .score() is called with strings that differ in case and punctuation
+    THEN: they should match exactly
+    """
+    assert Scorer("ratio").score("Ender's Game", " ENDERS GAME ") == 1.0
+
+
+def test_scorer_score_many():
+    """
+    GIVEN: a Scorer and a list of candidates
+    WHEN: .score_many() is called
+    THEN: the query should only be normalized once
+    AND: the scores should be the same as scoring each candidate
+    """
+    scorer = Scorer()
+    candidates = ["City of Ghosts", "City of Bones", "Tunnel of Bones"]
+    query = "city of ghosts (cassidy blake)"
+
+    normalize.cache_clear()
+    scores = scorer.score_many(query, candidates)
+    assert normalize.cache_info().misses == len(candidates) + 1
+
+    assert scores == [scorer.score(query, c) for c in candidates]
+
+
+def test_scorer_custom_metric():
+    """
+    GIVEN: a Scorer with a custom metric function
+    WHEN: .score() is called
+    THEN: the function should be called with the normalized strings
+    """
+    scorer = Scorer(lambda a, b: float(a == b))
+    assert scorer.score("Vicious", "vicious") == 1.0
@@ -0,0 +1,48 @@
+import pytest
+
+from bookdash.timing import PhaseTimer
+
+
+def test_phase(mocker):
+    """
+    GIVEN: a PhaseTimer
+    WHEN: the same phase is timed more than once
+    THEN: the times should be added together
+    AND: the phases should be kept in the order they were first timed
+    """
+    mocker.patch("bookdash.timing.perf_counter", side_effect=[0, 1, 1, 3, 3, 6])
+    timer = PhaseTimer()
+
+    with timer.phase("type"):
+        pass
+    with timer.phase("submit"):
+        pass
+    with timer.phase("type"):
+        pass
+
+    assert timer.phases == {"type": 4, "submit": 2}
+    assert timer.total == 6
+
+
+def test_phase_error():
+    """
+    GIVEN: a PhaseTimer
+    WHEN: a timed block raises an exception
+    THEN: the time should still be recorded
+    """
+    timer = PhaseTimer()
+
+    with pytest.raises(ValueError):
+        with timer.phase("submit"):
+            raise ValueError()
+
+    assert list(timer.phases) == ["submit"]
+
+
+def test_report_empty():
+    """
+    GIVEN: a PhaseTimer with no phases
+    WHEN: .report() is called
+    THEN: only the total should be reported
+    """
+    assert PhaseTimer().report() == "total   0.000s"
@@ -0,0 +1,233 @@
+"""
+Micro-benchmarks for bookdash hot paths.
+   To run: poetry run python tools/bench.py [<name> ...]
+"""
+
+import re
+import sys
+import tracemalloc
+from difflib import SequenceMatcher
+from functools import reduce
+from pathlib import Path
+from timeit import repeat
+
+from bs4 import BeautifulSoup
+from lxml import html
+
+ROOTDIR = Path(__file__).parent.parent
+DATADIR = ROOTDIR / "tests" / "data"
+
+sys.path.insert(0, str(ROOTDIR))
+
+from bookdash.books import Book  # noqa: E402
+from bookdash.csv_file import CsvFile  # noqa: E402
+from bookdash.elements.book_page_element import BookPageElement  # noqa: E402
+from bookdash.elements.element import parse  # noqa: E402
+from bookdash.elements.found_book_element import \
+    FoundBookElement  # noqa: E402
+from bookdash.models.goodreads_book import (RowConverter,  # noqa: E402
+                                            field_callbacks, head_to_attr)
+from bookdash.scoring import Scorer, normalize  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Register a benchmark function."""
+    BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def report(name, func, number=1, runs=5, count=None):
+    """Print the best time of runs for func."""
+    best = min(repeat(func, number=number, repeat=runs)) / number
+    rate = f"  {count / best:>12,.0f} /sec" if count else ""
+    print(f"  {name:<32} {best * 1000:>10.3f} ms{rate}")
+    return best
+
+
+@benchmark
+def bench_convert(scale=20):
+    """Compare per-cell from_csv reduction to the compiled RowConverter."""
+    csv = CsvFile(DATADIR / "goodreads-library-export.csv")
+    csv.read()
+    rows = csv.data * scale
+    values = [list(row.values()) for row in rows]
+    print(f"convert: {len(rows):,} rows")
+
+    def per_cell():
+        return [
+            {
+                head_to_attr(heading): reduce(
+                    lambda v, func: func(v), field_callbacks(heading), value
+                )
+                for heading, value in row.items()
+            }
+            for row in rows
+        ]
+
+    converter = RowConverter(tuple(csv[0]))
+
+    baseline = report("per-cell reduce", per_cell, count=len(rows))
+    best = report("RowConverter (dict rows)",
+                  lambda: converter.convert_many(rows), count=len(rows))
+    report("RowConverter (raw rows)",
+           lambda: converter.convert_many(values), count=len(rows))
+    print(f"  speedup: {baseline / best:.1f}x")
+
+
+@benchmark
+def bench_parse():
+    """Compare parsing book pages with lxml plus BeautifulSoup to lxml once."""
+    pages = [path.read_text() for path in DATADIR.glob("goodreads-book-*.html")]
+    print(f"parse: {len(pages)} book pages")
+
+    def bs4_pages():
+        for text in pages:
+            html.fromstring(text)
+            soup = BeautifulSoup(text, "html.parser")
+            soup.title.text
+            soup = BeautifulSoup(text, "html.parser")
+            soup.find_all("link", rel="canonical")
+
+    def element_pages():
+        for text in pages:
+            book = BookPageElement(text)
+            book.id
+
+    baseline = report("lxml + BeautifulSoup x2", bs4_pages, count=len(pages))
+    best = report("BookPageElement", element_pages, count=len(pages))
+    print(f"  speedup: {baseline / best:.1f}x")
+
+
+@benchmark
+def bench_details():
+    """Compare reading book details from the page markup to the page data."""
+    pages = [path.read_text() for path in DATADIR.glob("goodreads-book-*.html")]
+    pages = [text for text in pages if BookPageElement.DATA_MARKER in text]
+    marker = BookPageElement.DATA_MARKER
+    stripped = [text.replace(marker, "<script>") for text in pages]
+    print(f"details: {len(pages)} book pages")
+
+    def markup_details():
+        for text in stripped:
+            BookPageElement(text).details()
+
+    def data_details():
+        for text in pages:
+            BookPageElement(text).details()
+
+    baseline = report("page markup", markup_details, count=len(pages))
+    best = report("page data", data_details, count=len(pages))
+    print(f"  speedup: {baseline / best:.1f}x")
+
+
+@benchmark
+def bench_xpath():
+    """Compare string xpaths per row to the compiled selector registry."""
+    root = parse((DATADIR / "goodreads-search.html").read_text())
+    paths = FoundBookElement.SELECTORS
+    rows = root.xpath(paths["rows"])
+    print(f"xpath: {len(rows)} search rows")
+
+    def string_paths():
+        for row in rows:
+            for name in ("id", "author", "title", "url"):
+                row.xpath(paths[name])
+
+    def compiled_paths():
+        elm = FoundBookElement()
+        for row in rows:
+            for name in ("id", "author", "title", "url"):
+                elm.xpath(name, row)
+
+    baseline = report("string xpaths", string_paths, number=50, count=len(rows))
+    best = report("compiled selectors", compiled_paths, number=50, count=len(rows))
+    print(f"  speedup: {baseline / best:.1f}x")
+
+
+@benchmark
+def bench_books(scale=50):
+    """Compare the memory held by search results that keep their row elements
+    to Book records.
+
+    Only Python allocations are traced, so the parsed documents the elements
+    keep alive, which lxml allocates in C, are reported separately.
+    """
+    text = (DATADIR / "goodreads-search.html").read_text()
+    print(f"books: {scale} search result pages")
+
+    def held(func):
+        tracemalloc.start()
+        results = func()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        docs = {
+            result.element.getroottree().getroot() for result in results
+            if getattr(result, "element", None) is not None
+        }
+        print(f"  {func.__name__:<32} {size / 1024:>10,.0f} KB  "
+              f"({len(results):,} results, {len(docs)} documents kept)")
+        return size
+
+    def elements():
+        return [
+            FoundBookElement(row) for _ in range(scale)
+            for row in FoundBookElement.selector("rows")(parse(text))
+        ]
+
+    def books():
+        return [
+            Book(row) for _ in range(scale)
+            for row in FoundBookElement.selector("rows")(parse(text))
+        ]
+
+    baseline = held(elements)
+    best = held(books)
+    print(f"  reduction: {baseline / best:.1f}x")
+
+
+@benchmark
+def bench_match():
+    """Compare SequenceMatcher scoring to the Scorer over library titles."""
+    csv = CsvFile(DATADIR / "goodreads-library-export.csv")
+    csv.read()
+    titles = [row["Title"] for row in csv.data]
+    query = "Ender's Game (Ender's Saga, #1)"
+    print(f"match: {len(titles):,} titles")
+
+    filterer = re.compile(r"(?!\w|\s).")
+
+    def sequence_matcher():
+        def norm(text):
+            return filterer.sub("", str(text).lower().strip())
+        return [
+            SequenceMatcher(None, norm(title), norm(query)).ratio()
+            for title in titles
+        ]
+
+    def scorer(metric):
+        scorer = Scorer(metric)
+
+        def score():
+            normalize.cache_clear()
+            return scorer.score_many(query, titles)
+        return score
+
+    baseline = report("SequenceMatcher", sequence_matcher, count=len(titles))
+    best = report("Scorer ratio", scorer("ratio"), count=len(titles))
+    report("Scorer token_set", scorer("token_set"), count=len(titles))
+    report("Scorer partial", scorer("partial"), count=len(titles))
+    report("Scorer weighted", scorer("weighted"), count=len(titles))
+    print(f"  speedup (ratio): {baseline / best:.1f}x")
+
+
+def main(names):
+    """Run the named benchmarks, or all of them."""
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])